@@ -1,8 +1,12 @@
 import streamlit as st
 import pandas as pd
 from dashboard import render_dashboard
-from openai_integration import OpenAIIntegration
-import os
+from dashboard_ui import get_name_to_index
+from openai_integration import BATCH_FAILED_STATUSES, BATCH_POLL_INTERVAL, get_openai_integration, iter_product_fields
+from sheets_integration import get_sheets_integration, append_products, set_current_data
+import asyncio
+import re
+import time
 
 # Set page configuration
 st.set_page_config(
@@ -12,8 +16,11 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Add custom CSS for better styling
-st.markdown("""
+# Add custom CSS for better styling.
+# Streamlit removes elements that are not written again during a rerun, so the
+# styles must be emitted on every run; comments and whitespace are stripped to
+# keep the per-rerun payload small.
+_CSS = re.sub(r"\s+", " ", re.sub(r"/\*.*?\*/", "", """
 <style>
     .main .block-container {
         padding-top: 2rem;
@@ -63,7 +70,8 @@ st.markdown("""
         padding-top: 1rem;
     }
 </style>
-""", unsafe_allow_html=True)
+""", flags=re.S)).strip()
+st.markdown(_CSS, unsafe_allow_html=True)
 
 # Initialize session state
 if 'current_data' not in st.session_state:
@@ -75,8 +83,80 @@ if 'spreadsheet' not in st.session_state:
 if 'worksheet_index' not in st.session_state:
     st.session_state.worksheet_index = 0
 
+if 'pending_batches' not in st.session_state:
+    st.session_state.pending_batches = []
+
+def append_to_current_data(products):
+    """Append newly added products to the loaded data, matching its columns."""
+    current_data = st.session_state.current_data
+    if current_data is None:
+        return
+    
+    set_current_data(append_products(current_data, products))
+
+# Number of streamed chunks between placeholder redraws
+STREAM_RENDER_EVERY = 15
+
+def render_stream(chunks, render):
+    """Draw streamed text into one placeholder every few chunks and return the full text.
+    
+    render(placeholder, text) draws the text seen so far.
+    """
+    placeholder = st.empty()
+    buffer = []
+    for i, chunk in enumerate(chunks, start=1):
+        buffer.append(chunk)
+        if i % STREAM_RENDER_EVERY == 0:
+            render(placeholder, "".join(buffer))
+    
+    full_text = "".join(buffer)
+    render(placeholder, full_text)
+    return full_text
+
+def run_with_status(label, fn, *args, **kwargs):
+    """Run a blocking call inside a status container that reports how long it took.
+    
+    The call stays on the script thread: Streamlit elements and session state
+    are only safe to use from it, and long jobs go through the Batch API instead.
+    """
+    with st.status(label) as status:
+        start = time.monotonic()
+        result = fn(*args, **kwargs)
+        status.update(label=f"{label} done in {time.monotonic() - start:.1f}s", state="complete")
+    return result
+
+def apply_batch_result(batch_id, status, products, message):
+    """Report a batch check and drop the batch from the pending list once it has finished.
+    
+    Returns True if the batch is finished.
+    """
+    finished = status in BATCH_FAILED_STATUSES or products is not None
+    if finished and batch_id in st.session_state.pending_batches:
+        st.session_state.pending_batches.remove(batch_id)
+    
+    if status in BATCH_FAILED_STATUSES:
+        st.error(message)
+    elif products is not None:
+        if products:
+            st.session_state.batch_products = products
+            st.success(f"Successfully generated {len(products)} products!")
+        else:
+            st.error(message)
+    elif status:
+        st.info(message)
+    else:
+        st.error(message)
+    return finished
+
+@st.fragment(run_every=BATCH_POLL_INTERVAL)
+def watch_batch(batch_id):
+    """Check a pending batch every BATCH_POLL_INTERVAL seconds, rerunning the app once it finishes."""
+    status, products, message = openai_integration.poll_batch(batch_id)
+    if apply_batch_result(batch_id, status, products, message):
+        st.rerun()
+
 # Initialize OpenAI integration
-openai_integration = OpenAIIntegration()
+openai_integration = get_openai_integration()
 
 # Sidebar for OpenAI integration
 with st.sidebar:
@@ -95,7 +175,14 @@ with st.sidebar:
         st.success("✅ OpenAI API configured")
         if st.button("Clear API Key"):
             success, _ = openai_integration.set_api_key("")
-            st.experimental_rerun()
+            st.rerun()
+    
+    # Responses are sampled, so reusing saved ones across restarts is opt-in
+    persistent_cache = st.checkbox(
+        "Reuse saved AI responses",
+        key="openai_persistent_cache",
+        help="Answer repeated requests from responses saved on disk during the last day"
+    )
     
     # AI Product Generator
     st.subheader("Generate New Product")
@@ -107,23 +194,61 @@ with st.sidebar:
             
             price_min = st.number_input("Min Price ($)", value=49.0, step=10.0)
             price_max = st.number_input("Max Price ($)", value=199.0, step=10.0)
-            price_range = f"${price_min} - ${price_max}"
             
             features = st.text_area("Additional Features/Requirements", "")
             
+            num_variants = st.number_input("Variants", min_value=1, max_value=5, value=1, help="Generate several alternative products in a single request")
+            
             generate_button = st.form_submit_button("Generate Product")
             
-            if generate_button:
-                with st.spinner("Generating product..."):
-                    product_data, message = openai_integration.generate_product(
-                        product_type, target_audience, price_range, features
-                    )
+            if generate_button and num_variants > 1:
+                price_range = f"${price_min} - ${price_max}"
+                
+                variants, message = run_with_status(
+                    f"Generating {num_variants} variants...",
+                    openai_integration.generate_product_variants,
+                    product_type, target_audience, price_range, features, n=num_variants
+                )
+                
+                if variants:
+                    st.session_state.product_variants = variants
+                    st.session_state.generated_product = variants[0]
+                    st.success(message)
+                else:
+                    st.error(message or "Failed to generate variants")
+            elif generate_button:
+                price_range = f"${price_min} - ${price_max}"
+                st.session_state.pop('product_variants', None)
+                
+                try:
+                    # Parse the response as it streams in and show each field once it is complete
+                    placeholder = st.empty()
+                    product = {}
+                    for field, value in iter_product_fields(
+                        openai_integration.generate_product_stream(
+                            product_type, target_audience, price_range, features, persistent_cache=persistent_cache
+                        )
+                    ):
+                        product[field] = value
+                        placeholder.json(product)
                     
-                    if product_data:
-                        st.session_state.generated_product = product_data
+                    if product:
+                        st.session_state.generated_product = product
                         st.success("Product generated successfully!")
                     else:
-                        st.error(message)
+                        st.error("Error generating product: empty response")
+                except Exception as e:
+                    st.error(f"Error generating product: {str(e)}")
+        
+        # Let the user pick one of the generated variants
+        if len(st.session_state.get('product_variants', ())) > 1:
+            variants = st.session_state.product_variants
+            selected_variant = st.radio(
+                "Variant",
+                range(len(variants)),
+                format_func=lambda i: variants[i].get('Name', f"Variant {i + 1}")
+            )
+            st.session_state.generated_product = variants[selected_variant]
         
         # Display generated product
         if 'generated_product' in st.session_state:
@@ -142,8 +267,7 @@ with st.sidebar:
                 # Add to Google Sheets button
                 if st.button("Add to Google Sheets", use_container_width=True):
                     if 'spreadsheet' in st.session_state and st.session_state.spreadsheet is not None:
-                        from sheets_integration import GoogleSheetsIntegration
-                        sheets = GoogleSheetsIntegration()
+                        sheets = get_sheets_integration()
                         
                         success, message = sheets.add_row(
                             st.session_state.spreadsheet,
@@ -153,14 +277,8 @@ with st.sidebar:
                         
                         if success:
                             st.success(message)
-                            # Reload data to include the new product
-                            df_new, msg = sheets.get_worksheet_data(
-                                st.session_state.spreadsheet, 
-                                st.session_state.worksheet_index
-                            )
-                            if df_new is not None:
-                                st.session_state.current_data = df_new
-                                st.experimental_rerun()
+                            # Include the new product locally instead of reloading the sheet
+                            append_to_current_data([product])
                         else:
                             st.error(message)
                     else:
@@ -175,23 +293,38 @@ with st.sidebar:
             common_price_range = st.text_input("Common Price Range", "$99 - $299")
             common_features = st.text_area("Common Features/Requirements", "Cloud-based, API integration, User-friendly interface")
             
-            num_products = len(product_types.strip().split('\n')) if product_types.strip() else 0
+            stripped_product_types = product_types.strip()
+            num_products = stripped_product_types.count('\n') + 1 if stripped_product_types else 0
+            
+            use_batch_api = st.checkbox("Submit as Batch (cheaper, ~24h)", help="Uses the OpenAI Batch API at half the cost. Results are available once the batch completes.")
             
             generate_batch_button = st.form_submit_button(f"Generate {num_products} Products")
             
-            if generate_batch_button and num_products > 0:
-                product_type_list = product_types.strip().split('\n')
+            if generate_batch_button and num_products > 0 and use_batch_api:
+                product_type_list = stripped_product_types.split('\n')
                 
-                with st.spinner(f"Generating {num_products} products..."):
-                    batch_products = []
+                with st.spinner(f"Submitting batch of {num_products} products..."):
+                    batch_id, message = openai_integration.submit_product_batch(
+                        product_type_list, common_audience, common_price_range, common_features
+                    )
                     
-                    for product_type in product_type_list:
-                        product_data, message = openai_integration.generate_product(
-                            product_type, common_audience, common_price_range, common_features
+                    if batch_id:
+                        st.session_state.pending_batches.append(batch_id)
+                        st.success(f"Batch submitted: {batch_id}")
+                    else:
+                        st.error(message)
+            elif generate_batch_button and num_products > 0:
+                product_type_list = stripped_product_types.split('\n')
+                
+                with st.spinner(f"Generating {num_products} products..."):
+                    progress_bar = st.progress(0.0)
+                    results = asyncio.run(openai_integration.generate_products_batch(
+                        product_type_list, common_audience, common_price_range, common_features,
+                        on_progress=lambda completed, total: progress_bar.progress(
+                            completed / total, text=f"Generated {completed} of {total} products"
                         )
-                        
-                        if product_data:
-                            batch_products.append(product_data)
+                    ))
+                    batch_products = [product for product in results if product]
                     
                     if batch_products:
                         st.session_state.batch_products = batch_products
@@ -199,46 +332,57 @@ with st.sidebar:
                     else:
                         st.error("Failed to generate products")
         
+        # Check status of batches submitted through the Batch API
+        if st.session_state.pending_batches:
+            st.subheader("Check Batch Status")
+            
+            selected_batch = st.selectbox("Pending Batch", st.session_state.pending_batches)
+            
+            if st.button("Check Batch Status", use_container_width=True):
+                status, products, message = run_with_status(
+                    "Checking batch...", openai_integration.poll_batch, selected_batch
+                )
+                apply_batch_result(selected_batch, status, products, message)
+            
+            # Polling runs in a fragment, so the rest of the app stays interactive meanwhile
+            if st.checkbox(f"Check automatically every {BATCH_POLL_INTERVAL}s", key="watch_pending_batch"):
+                watch_batch(selected_batch)
+        
         # Display batch generated products
         if 'batch_products' in st.session_state and st.session_state.batch_products:
             st.subheader("Batch Generated Products")
             
-            for i, product in enumerate(st.session_state.batch_products):
-                with st.expander(f"{i+1}. {product.get('Name', 'Product')}"):
-                    st.markdown(f"**Price:** ${product.get('Regular price', 'N/A')}")
-                    st.markdown(f"**Categories:** {product.get('Categories', 'N/A')}")
-                    st.markdown(f"**Short Description:** {product.get('Short description', 'N/A')}")
-                    st.markdown(f"**Full Description:** {product.get('Description', 'N/A')}")
+            # One table for the whole batch rather than an expander per product
+            batch_df = pd.DataFrame(st.session_state.batch_products).reindex(
+                columns=['Name', 'Regular price', 'Categories', 'Short description', 'Description']
+            )
+            st.dataframe(
+                batch_df,
+                use_container_width=True,
+                column_config={
+                    "Description": st.column_config.TextColumn("Description", width="large"),
+                },
+                hide_index=True,
+            )
             
             # Add all to Google Sheets button
             if st.button("Add All to Google Sheets", use_container_width=True):
                 if 'spreadsheet' in st.session_state and st.session_state.spreadsheet is not None:
-                    from sheets_integration import GoogleSheetsIntegration
-                    sheets = GoogleSheetsIntegration()
+                    sheets = get_sheets_integration()
                     
-                    success_count = 0
-                    for product in st.session_state.batch_products:
-                        success, _ = sheets.add_row(
-                            st.session_state.spreadsheet,
-                            st.session_state.worksheet_index,
-                            product
-                        )
-                        
-                        if success:
-                            success_count += 1
+                    success, message = sheets.add_rows(
+                        st.session_state.spreadsheet,
+                        st.session_state.worksheet_index,
+                        st.session_state.batch_products
+                    )
+                    success_count = len(st.session_state.batch_products) if success else 0
                     
                     if success_count > 0:
                         st.success(f"Added {success_count} products to Google Sheets")
-                        # Reload data to include the new products
-                        df_new, msg = sheets.get_worksheet_data(
-                            st.session_state.spreadsheet, 
-                            st.session_state.worksheet_index
-                        )
-                        if df_new is not None:
-                            st.session_state.current_data = df_new
-                            st.experimental_rerun()
+                        # Include the new products locally instead of reloading the sheet
+                        append_to_current_data(st.session_state.batch_products)
                     else:
-                        st.error("Failed to add products")
+                        st.error(message)
                 else:
                     st.error("Please load a spreadsheet first")
         
@@ -248,29 +392,33 @@ with st.sidebar:
         with st.form("description_improver_form"):
             if 'current_data' in st.session_state and st.session_state.current_data is not None:
                 df = st.session_state.current_data
-                product_names = df['Name'].tolist()
-                selected_product = st.selectbox("Select Product", product_names)
+                selected_product = st.selectbox("Select Product", df['Name'])
                 
                 if selected_product:
-                    product_index = product_names.index(selected_product)
-                    current_description = df.iloc[product_index]['Description']
+                    product_index = get_name_to_index(df['Name'])[selected_product]
+                    current_description = df.at[product_index, 'Description']
                     
                     st.text_area("Current Description", current_description, height=150, disabled=True)
                     
                     improve_button = st.form_submit_button("Improve Description")
                     
                     if improve_button:
-                        with st.spinner("Improving description..."):
-                            improved_description, message = openai_integration.improve_product_description(
-                                selected_product, current_description
-                            )
+                        try:
+                            improved_description = render_stream(
+                                openai_integration.improve_product_description_stream(
+                                    selected_product, current_description, persistent_cache=persistent_cache
+                                ),
+                                lambda placeholder, text: placeholder.markdown(text)
+                            ).strip()
                             
                             if improved_description:
                                 st.session_state.improved_description = improved_description
                                 st.session_state.improved_product_index = product_index
                                 st.success("Description improved successfully!")
                             else:
-                                st.error(message)
+                                st.error("Error improving description: empty response")
+                        except Exception as e:
+                            st.error(f"Error improving description: {str(e)}")
             else:
                 st.warning("Please load product data first")
                 st.form_submit_button("Improve Description", disabled=True)
@@ -285,29 +433,25 @@ with st.sidebar:
                 # Update in Google Sheets button
                 if st.button("Update in Google Sheets", use_container_width=True):
                     if 'spreadsheet' in st.session_state and st.session_state.spreadsheet is not None:
-                        from sheets_integration import GoogleSheetsIntegration
-                        sheets = GoogleSheetsIntegration()
+                        sheets = get_sheets_integration()
                         
-                        # Get the current product data
                         df = st.session_state.current_data
                         product_index = st.session_state.improved_product_index
-                        product_data = df.iloc[product_index].to_dict()
-                        
-                        # Update the description
-                        product_data['Description'] = st.session_state.improved_description
                         
-                        success, message = sheets.update_row(
+                        # Only the description cell changes; the columns mirror the sheet headers
+                        success, message = sheets.update_cell(
                             st.session_state.spreadsheet,
                             st.session_state.worksheet_index,
                             product_index + 1,  # +1 to account for header row
-                            product_data
+                            df.columns.get_loc('Description'),
+                            st.session_state.improved_description
                         )
                         
                         if success:
                             st.success(message)
                             # Update the local dataframe
                             df.at[product_index, 'Description'] = st.session_state.improved_description
-                            st.session_state.current_data = df
+                            set_current_data(df)
                         else:
                             st.error(message)
                     else:
@@ -1,14 +1,69 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-from sheets_integration import GoogleSheetsIntegration
-import json
+import numpy as np
+from sheets_integration import (
+    CATEGORICAL_COLUMNS, SEARCH_COLUMN, get_sheets_integration, load_worksheet_data, add_missing_categories,
+    add_search_column, append_products, data_version, get_category_index, set_current_data, visible_columns
+)
+import gc
 from dashboard_ui import render_dashboard_overview, render_bulk_operations_ui
 
+# Number of rows shown per page in the Products Overview table
+PRODUCTS_PAGE_SIZE = 200
+
+# Input widget and its arguments for each column of the Add New Product form
+NEW_PRODUCT_WIDGETS = {
+    'Description': (st.text_area, {'value': "", 'height': 150}),
+    'Status': (st.selectbox, {'options': ["Published", "Draft"], 'index': 1}),  # Default to Draft
+    'Regular price': (st.number_input, {'value': 0.0, 'step': 1.0}),
+    'Sale price': (st.number_input, {'value': 0.0, 'step': 1.0}),
+}
+DEFAULT_NEW_PRODUCT_WIDGET = (st.text_input, {'value': ""})
+
+def new_product_input(col):
+    """Render the Add New Product input for a column and return its value."""
+    widget, kwargs = NEW_PRODUCT_WIDGETS.get(col, DEFAULT_NEW_PRODUCT_WIDGET)
+    return widget(f"New {col}", **kwargs)
+
+def filter_product_index(df, search_term, selected_category):
+    """Return the index of products matching the search term and category.
+    
+    The result is memoized in session state per data version and filter
+    values, so reruns triggered by unrelated widgets skip the string scans;
+    see set_current_data.
+    """
+    key = (data_version(), search_term, selected_category)
+    cached = st.session_state.get('product_filter')
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    
+    # Combine the filters as one boolean mask; no intermediate frames are built
+    mask = np.ones(len(df), dtype=bool)
+    if search_term:
+        # Single literal pass over the precomputed lowercase Name + Description text
+        mask &= df[SEARCH_COLUMN].str.contains(search_term.lower(), regex=False, na=False).to_numpy(dtype=bool)
+    
+    if selected_category != 'All' and 'Categories' in df.columns:
+        mask &= df.index.isin(get_category_index(df).get(selected_category, []))
+    
+    filtered_index = df.index[mask]
+    st.session_state.product_filter = (key, filtered_index)
+    return filtered_index
+
 def render_dashboard():
     """Render the main dashboard interface."""
+    # Pause cyclic GC while the render allocates its DataFrames and figures;
+    # collection resumes as soon as it is re-enabled
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        _render_dashboard()
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+def _render_dashboard():
     # Initialize Google Sheets integration
-    sheets = GoogleSheetsIntegration()
+    sheets = get_sheets_integration()
     
     # Sidebar for authentication and settings
     with st.sidebar:
@@ -53,7 +108,7 @@ def render_dashboard():
             if st.button("Logout"):
                 st.session_state.gsheets_creds = None
                 st.session_state.gsheets_client = None
-                st.experimental_rerun()
+                st.rerun()
         
         # Spreadsheet URL input
         st.subheader("Spreadsheet Settings")
@@ -63,6 +118,10 @@ def render_dashboard():
         )
         
         worksheet_index = st.number_input("Worksheet Index", min_value=0, value=0, step=1)
+        refresh = st.checkbox(
+            "Fetch latest from sheet", value=False,
+            help="Skip the cached copy, which can be up to an hour old, to pick up edits made directly in Google Sheets"
+        )
         
         # Load data button
         if st.button("Load Data"):
@@ -70,10 +129,10 @@ def render_dashboard():
                 with st.spinner("Loading data..."):
                     spreadsheet, message = sheets.get_spreadsheet(spreadsheet_url)
                     if spreadsheet:
-                        df, msg = sheets.get_worksheet_data(spreadsheet, worksheet_index)
+                        df, msg = load_worksheet_data(sheets, spreadsheet, worksheet_index, refresh=refresh)
                         if df is not None:
                             st.session_state.spreadsheet = spreadsheet
-                            st.session_state.current_data = df
+                            set_current_data(df)
                             st.session_state.worksheet_index = worksheet_index
                             st.success(f"Data loaded successfully: {len(df)} products")
                         else:
@@ -104,24 +163,27 @@ def render_dashboard():
                 search_term = st.text_input("Search Products", "")
             with col2:
                 if 'Categories' in df.columns:
-                    categories = ['All'] + sorted(df['Categories'].unique().tolist())
+                    categories = ['All'] + list(get_category_index(df))
                     selected_category = st.selectbox("Filter by Category", categories)
                 else:
                     selected_category = 'All'
             
             # Apply filters
-            filtered_df = df.copy()
-            if search_term:
-                filtered_df = filtered_df[filtered_df['Name'].str.contains(search_term, case=False) | 
-                                         filtered_df['Description'].str.contains(search_term, case=False)]
+            filtered_index = filter_product_index(df, search_term, selected_category)
             
-            if selected_category != 'All' and 'Categories' in df.columns:
-                filtered_df = filtered_df[filtered_df['Categories'].str.contains(selected_category, case=False)]
+            # Only materialize and send the rows of the current page
+            num_pages = max(1, -(-len(filtered_index) // PRODUCTS_PAGE_SIZE))
+            page = st.number_input("Page", min_value=1, max_value=num_pages, value=1, step=1)
+            start = (page - 1) * PRODUCTS_PAGE_SIZE
+            page_df = df.loc[filtered_index[start:start + PRODUCTS_PAGE_SIZE]]
             
             # Display products in a table
-            st.write(f"Showing {len(filtered_df)} products")
+            if len(filtered_index) > PRODUCTS_PAGE_SIZE:
+                st.write(f"Showing {start + 1}-{start + len(page_df)} of {len(filtered_index)} products")
+            else:
+                st.write(f"Showing {len(filtered_index)} products")
             st.dataframe(
-                filtered_df,
+                page_df,
                 column_config={
                     "Name": st.column_config.TextColumn("Product Name"),
                     "Description": st.column_config.TextColumn("Description", width="large"),
@@ -130,6 +192,7 @@ def render_dashboard():
                     "Status": st.column_config.SelectboxColumn(
                         "Status", options=["Published", "Draft"]
                     ),
+                    SEARCH_COLUMN: None,
                 },
                 hide_index=True,
             )
@@ -138,82 +201,77 @@ def render_dashboard():
         with tab3:
             st.header("Edit Products")
             
-            # Product selection
-            selected_product_index = st.selectbox(
-                "Select Product to Edit",
-                options=range(len(df)),
-                format_func=lambda i: df.iloc[i]['Name'] if i < len(df) else "Select a product"
+            st.caption("Edit cells directly in the table, then save to write the changed cells to Google Sheets.")
+            
+            # One grid for all products; categorical columns are edited as free text
+            editor_df = df[visible_columns(df)].astype(
+                {col: 'object' for col in CATEGORICAL_COLUMNS if col in df.columns}
+            )
+            st.data_editor(
+                editor_df,
+                column_config={
+                    "Name": st.column_config.TextColumn("Product Name"),
+                    "Description": st.column_config.TextColumn("Description", width="large"),
+                    "Regular price": st.column_config.NumberColumn("Regular Price", format="$%.2f", step=1.0),
+                    "Sale price": st.column_config.NumberColumn("Sale Price", format="$%.2f", step=1.0),
+                    "Status": st.column_config.SelectboxColumn(
+                        "Status", options=["Published", "Draft"]
+                    ),
+                    # record_id is usually auto-generated
+                    "record_id": st.column_config.Column(disabled=True),
+                },
+                hide_index=True,
+                key="product_editor",
             )
             
-            if selected_product_index is not None:
-                product = df.iloc[selected_product_index]
-                
-                with st.form("edit_product_form"):
-                    st.subheader(f"Editing: {product['Name']}")
-                    
-                    # Create form fields for each column
-                    edited_product = {}
-                    for col in df.columns:
-                        # Skip record_id as it's usually auto-generated
-                        if col == 'record_id':
-                            edited_product[col] = product[col]
-                            continue
-                            
-                        # Different input types based on column name/type
-                        if col == 'Description':
-                            edited_product[col] = st.text_area(col, product[col], height=150)
-                        elif col == 'Status':
-                            edited_product[col] = st.selectbox(col, ["Published", "Draft"], index=0 if product[col] == "Published" else 1)
-                        elif col in ['Regular price', 'Sale price']:
-                            try:
-                                value = float(product[col]) if not pd.isna(product[col]) else 0.0
-                            except:
-                                value = 0.0
-                            edited_product[col] = st.number_input(col, value=value, step=1.0)
-                        else:
-                            edited_product[col] = st.text_input(col, product[col])
-                    
-                    # Submit button
-                    submitted = st.form_submit_button("Save Changes")
+            # The editor state holds only the changed cells, keyed by row position
+            edited_rows = st.session_state.get("product_editor", {}).get("edited_rows", {})
+            
+            if st.button("Save Changes", disabled=not edited_rows):
+                if 'spreadsheet' in st.session_state:
+                    cells = [
+                        (int(pos) + 1, df.columns.get_loc(col), value)  # +1 to account for header row
+                        for pos, changes in edited_rows.items()
+                        for col, value in changes.items()
+                    ]
+                    success, message = sheets.update_cells(
+                        st.session_state.spreadsheet,
+                        st.session_state.worksheet_index,
+                        cells
+                    )
                     
-                    if submitted:
-                        if 'spreadsheet' in st.session_state:
-                            success, message = sheets.update_row(
-                                st.session_state.spreadsheet,
-                                st.session_state.worksheet_index,
-                                selected_product_index + 1,  # +1 to account for header row
-                                edited_product
-                            )
-                            
-                            if success:
-                                st.success(message)
-                                # Update the local dataframe
-                                for col in edited_product:
-                                    df.at[selected_product_index, col] = edited_product[col]
-                                st.session_state.current_data = df
-                            else:
-                                st.error(message)
-                        else:
-                            st.error("Spreadsheet not loaded. Please load data first.")
+                    if success:
+                        # Update the local dataframe with one assignment per edited column
+                        column_updates = {}
+                        for pos, changes in edited_rows.items():
+                            row = df.index[int(pos)]
+                            for col, value in changes.items():
+                                column_updates.setdefault(col, ([], []))
+                                column_updates[col][0].append(row)
+                                column_updates[col][1].append(value)
+                        for col, (rows, values) in column_updates.items():
+                            add_missing_categories(df, col, values)
+                            df.loc[rows, col] = values
+                        add_search_column(df, [df.index[int(pos)] for pos in edited_rows])
+                        set_current_data(df)
+                        
+                        # Reset the editor so its pending changes match the saved data
+                        del st.session_state["product_editor"]
+                        st.toast(message)
+                        st.rerun()
+                    else:
+                        st.error(message)
+                else:
+                    st.error("Spreadsheet not loaded. Please load data first.")
             
             # Add new product section
             st.subheader("Add New Product")
             with st.form("add_product_form"):
-                new_product = {}
-                for col in df.columns:
-                    # Skip record_id as it's usually auto-generated
-                    if col == 'record_id':
-                        continue
-                        
-                    # Different input types based on column name/type
-                    if col == 'Description':
-                        new_product[col] = st.text_area(f"New {col}", "", height=150)
-                    elif col == 'Status':
-                        new_product[col] = st.selectbox(f"New {col}", ["Published", "Draft"], index=1)  # Default to Draft
-                    elif col in ['Regular price', 'Sale price']:
-                        new_product[col] = st.number_input(f"New {col}", value=0.0, step=1.0)
-                    else:
-                        new_product[col] = st.text_input(f"New {col}", "")
+                # Skip record_id as it's usually auto-generated
+                new_product = {
+                    col: new_product_input(col)
+                    for col in visible_columns(df) if col != 'record_id'
+                }
                 
                 # Submit button
                 submitted = st.form_submit_button("Add Product")
@@ -227,12 +285,10 @@ def render_dashboard():
                         )
                         
                         if success:
-                            st.success(message)
-                            # Reload data to include the new product
-                            df_new, msg = sheets.get_worksheet_data(st.session_state.spreadsheet, st.session_state.worksheet_index)
-                            if df_new is not None:
-                                st.session_state.current_data = df_new
-                                st.experimental_rerun()
+                            # Append the new product locally instead of reloading the sheet;
+                            # the other tabs pick it up on the next rerun
+                            set_current_data(append_products(df, [new_product]))
+                            st.toast(message)
                         else:
                             st.error(message)
                     else:
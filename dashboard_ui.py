@@ -1,35 +1,66 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 import plotly.graph_objects as go
+from plotly.subplots import make_subplots
 from datetime import datetime
-import random
+import io
 import numpy as np
+import orjson
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+from sheets_integration import (
+    PRICE_COLUMNS, SEARCH_COLUMN, add_missing_categories, append_products, data_version, get_category_index,
+    set_current_data, visible_columns
+)
 
-def render_metric_cards(df):
-    """Render metric cards with key statistics."""
-    # Calculate metrics
-    total_products = len(df)
-    
-    # Calculate average price
-    try:
-        avg_price = pd.to_numeric(df['Regular price'], errors='coerce').mean()
-        if pd.isna(avg_price):
-            avg_price = 0
-    except:
-        avg_price = 0
+# Seeded generator for the mock chart data; keeps numpy's global random state untouched
+_RNG = np.random.default_rng(42)
+
+def _json_default(value):
+    """Serialize values orjson has no native support for, such as missing Arrow strings."""
+    if value is pd.NA:
+        return None
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+def get_name_to_index(names):
+    """Map each product name to the position of its first occurrence, cached per data version."""
+    names_key = data_version()
+    cached = st.session_state.get('name_to_index')
     
-    # Count published products
-    try:
-        published_count = len(df[df['Status'] == 'Published']) if 'Status' in df.columns else 0
-    except:
-        published_count = 0
+    if cached is None or cached[0] != names_key:
+        name_to_index = {}
+        for i, name in enumerate(names):
+            name_to_index.setdefault(name, i)
+        st.session_state.name_to_index = (names_key, name_to_index)
     
-    # Count draft products
-    try:
-        draft_count = len(df[df['Status'] == 'Draft']) if 'Status' in df.columns else 0
-    except:
-        draft_count = 0
+    return st.session_state.name_to_index[1]
+
+@st.cache_data(ttl=300, max_entries=16, show_spinner=False)
+def _metric_stats(total, prices, status_counts):
+    """Compute the metric card values from the price column and (status, count) pairs."""
+    avg_price = pd.Series(prices, dtype='float64').mean() if prices is not None else np.nan
+    counts = dict(status_counts)
+    return {
+        'total': total,
+        'avg_price': 0 if pd.isna(avg_price) else float(avg_price),
+        'published': int(counts.get('Published', 0)),
+        'draft': int(counts.get('Draft', 0)),
+    }
+
+def render_metric_cards(df):
+    """Render metric cards with key statistics."""
+    # Calculate metrics; prices are already numeric from load time
+    stats = _metric_stats(
+        len(df),
+        df['Regular price'].to_numpy(dtype='float64') if 'Regular price' in df.columns else None,
+        # Counted on the categorical codes and passed as plain pairs, so the cache
+        # key is built from the values rather than object pointers
+        tuple(df['Status'].value_counts().items()) if 'Status' in df.columns else (),
+    )
+    total_products = stats['total']
+    avg_price = stats['avg_price']
+    published_count = stats['published']
+    draft_count = stats['draft']
     
     # Create 3 columns for metrics
     col1, col2, col3, col4 = st.columns(4)
@@ -67,6 +98,10 @@ def render_metric_cards(df):
             help="Number of products with 'Draft' status"
         )
 
+def _price(value):
+    """Return a numeric price as a float, treating missing values (None or NaN) as 0."""
+    return float(value) if value is not None and value == value else 0.0
+
 def render_product_cards(df, num_cards=3):
     """Render product cards in a grid layout."""
     try:
@@ -87,22 +122,15 @@ def render_product_cards(df, num_cards=3):
             cols = st.columns(min(num_cards, len(featured_products)))
             
             # Display each product in a card
-            for i, (_, product) in enumerate(featured_products.iterrows()):
+            for i, product in enumerate(featured_products.to_dict(orient='records')):
                 with cols[i]:
                     with st.container(border=True):
                         # Product name as header
                         st.markdown(f"### {product.get('Name', 'Product')}")
                         
-                        # Price information
-                        try:
-                            regular_price = float(product['Regular price']) if 'Regular price' in product and pd.notna(product['Regular price']) and product['Regular price'] != '' else 0
-                        except (ValueError, TypeError):
-                            regular_price = 0
-                            
-                        try:
-                            sale_price = float(product['Sale price']) if 'Sale price' in product and pd.notna(product['Sale price']) and product['Sale price'] != '' else 0
-                        except (ValueError, TypeError):
-                            sale_price = 0
+                        # Price information; prices are already numeric from load time
+                        regular_price = _price(product.get('Regular price'))
+                        sale_price = _price(product.get('Sale price'))
                         
                         if sale_price > 0 and sale_price < regular_price:
                             st.markdown(f"<span style='text-decoration: line-through;'>${regular_price:.2f}</span> <span style='color: red; font-weight: bold;'>${sale_price:.2f}</span>", unsafe_allow_html=True)
@@ -122,219 +150,283 @@ def render_product_cards(df, num_cards=3):
     except Exception as e:
         st.error(f"Error rendering product cards: {str(e)}")
 
+# Axis and hover settings shared by every sales trend figure
+_SALES_TREND_LAYOUT = dict(
+    xaxis=dict(
+        tickformat="%b %d",
+        tickangle=-45,
+        tickmode='auto',
+        nticks=10
+    ),
+    yaxis=dict(
+        tickmode='auto',
+        nticks=10
+    ),
+    hovermode="x unified"
+)
+
+@st.cache_data(ttl=300, max_entries=16, show_spinner=False)
+def _sales_trend_figure(start_date):
+    """Build the mock sales trend figure for the 30 days from start_date."""
+    # Generate mock data
+    dates = pd.date_range(start=start_date, periods=30, freq='D')
+    
+    # Create some realistic looking sales data with weekend peaks
+    base_sales = _RNG.integers(5, 15, size=30)
+    weekend_boost = np.array([3 if d.weekday() >= 5 else 0 for d in dates])
+    trend_boost = np.linspace(0, 5, 30)  # Upward trend
+    
+    sales = base_sales + weekend_boost + trend_boost
+    
+    # Create DataFrame
+    sales_df = pd.DataFrame({
+        'Date': dates,
+        'Sales': sales
+    })
+    
+    # Create the chart; WebGL keeps drawing cheap as the series grows
+    fig = go.Figure(go.Scattergl(
+        x=sales_df['Date'],
+        y=sales_df['Sales'],
+        mode='lines+markers',
+        hovertemplate="%{x|%b %d}<br>Units Sold: %{y}<extra></extra>"
+    ))
+    
+    fig.update_layout(_SALES_TREND_LAYOUT)
+    fig.update_layout(
+        title="Sales Trend (Last 30 Days)",
+        xaxis_title='',
+        yaxis_title='Units Sold'
+    )
+    
+    return fig
+
+@st.fragment
 def render_sales_trend_chart():
     """Render a mock sales trend chart."""
     try:
-        # Generate mock data
-        dates = pd.date_range(start=datetime.now().replace(day=1), periods=30, freq='D')
-        
-        # Create some realistic looking sales data with weekend peaks
-        base_sales = np.random.randint(5, 15, size=30)
-        weekend_boost = np.array([3 if d.weekday() >= 5 else 0 for d in dates])
-        trend_boost = np.linspace(0, 5, 30)  # Upward trend
-        
-        sales = base_sales + weekend_boost + trend_boost
-        
-        # Create DataFrame
-        sales_df = pd.DataFrame({
-            'Date': dates,
-            'Sales': sales
-        })
-        
-        # Create the chart
-        fig = px.line(
-            sales_df, 
-            x='Date', 
-            y='Sales',
-            title="Sales Trend (Last 30 Days)",
-            labels={'Sales': 'Units Sold', 'Date': ''},
-            markers=True
-        )
-        
-        fig.update_layout(
-            xaxis=dict(
-                tickformat="%b %d",
-                tickangle=-45,
-                tickmode='auto',
-                nticks=10
-            ),
-            yaxis=dict(
-                tickmode='auto',
-                nticks=10
-            ),
-            hovermode="x unified"
-        )
+        # Keyed on the start date so the mock data stays stable across reruns
+        fig = _sales_trend_figure(datetime.now().replace(day=1).date())
         
         st.plotly_chart(fig, use_container_width=True)
     except Exception as e:
         st.error(f"Error rendering sales trend chart: {str(e)}")
 
+@st.cache_data(ttl=300, max_entries=16, show_spinner=False)
+def _category_counts(value_counts):
+    """Count products per category from the value counts of the comma-separated Categories column."""
+    counts = pd.DataFrame({
+        'Category': pd.Series(value_counts.index.astype(str)).str.split(','),
+        'Count': value_counts.to_numpy(),
+    }).explode('Category')
+    counts['Category'] = counts['Category'].str.strip()
+    counts = counts[counts['Category'] != '']
+    return counts.groupby('Category', sort=True)['Count'].sum().reset_index()
+
+@st.cache_data(ttl=300, max_entries=16, show_spinner=False)
+def _category_performance_figure(category_counts):
+    """Build the category performance figure from per-category product counts."""
+    # Generate mock revenue data for each category
+    rng = np.random.default_rng(42)  # For reproducibility
+    category_counts['Avg Price'] = rng.uniform(50, 200, size=len(category_counts))
+    category_counts['Revenue'] = category_counts['Count'] * category_counts['Avg Price']
+    
+    # Sort by revenue
+    category_counts = category_counts.sort_values('Revenue', ascending=False)
+    
+    # Take top 10 categories
+    top_categories = category_counts.head(min(10, len(category_counts)))
+    
+    # Create the chart
+    fig = go.Figure()
+    
+    # Add bars for product count
+    fig.add_trace(go.Bar(
+        x=top_categories['Category'],
+        y=top_categories['Count'],
+        name='Product Count',
+        marker_color='#4C78A8'
+    ))
+    
+    # Add line for revenue
+    fig.add_trace(go.Scatter(
+        x=top_categories['Category'],
+        y=top_categories['Revenue'],
+        name='Est. Revenue ($)',
+        mode='lines+markers',
+        marker=dict(color='#E45756'),
+        yaxis='y2'
+    ))
+    
+    # Update layout
+    fig.update_layout(
+        title='Top Categories by Product Count and Estimated Revenue',
+        xaxis=dict(
+            title='Category',
+            tickangle=-45
+        ),
+        yaxis=dict(
+            title='Product Count',
+            titlefont=dict(color='#4C78A8'),
+            tickfont=dict(color='#4C78A8')
+        ),
+        yaxis2=dict(
+            title='Est. Revenue ($)',
+            titlefont=dict(color='#E45756'),
+            tickfont=dict(color='#E45756'),
+            anchor='x',
+            overlaying='y',
+            side='right'
+        ),
+        legend=dict(
+            orientation='h',
+            yanchor='bottom',
+            y=1.02,
+            xanchor='right',
+            x=1
+        ),
+        hovermode='x unified'
+    )
+    
+    return fig
+
+@st.fragment
 def render_category_performance_chart(df):
     """Render a category performance chart."""
     try:
         if 'Categories' not in df.columns:
             return
         
-        # Extract all unique categories
-        all_categories = []
-        for cats in df['Categories'].dropna():
-            try:
-                categories = [c.strip() for c in str(cats).split(',')]
-                all_categories.extend(categories)
-            except:
-                pass
+        # Split only the distinct Categories strings, weighted by how often each occurs
+        value_counts = df['Categories'].value_counts()
+        category_counts = _category_counts(value_counts[value_counts > 0])
         
-        if not all_categories:
+        if category_counts.empty:
             return
-            
-        # Count occurrences
-        category_counts = pd.Series(all_categories).value_counts().reset_index()
-        category_counts.columns = ['Category', 'Count']
-        
-        # Generate mock revenue data for each category
-        np.random.seed(42)  # For reproducibility
-        category_counts['Avg Price'] = np.random.uniform(50, 200, size=len(category_counts))
-        category_counts['Revenue'] = category_counts['Count'] * category_counts['Avg Price']
-        
-        # Sort by revenue
-        category_counts = category_counts.sort_values('Revenue', ascending=False)
-        
-        # Take top 10 categories
-        top_categories = category_counts.head(min(10, len(category_counts)))
-        
-        # Create the chart
-        fig = go.Figure()
-        
-        # Add bars for product count
-        fig.add_trace(go.Bar(
-            x=top_categories['Category'],
-            y=top_categories['Count'],
-            name='Product Count',
-            marker_color='#4C78A8'
-        ))
         
-        # Add line for revenue
-        fig.add_trace(go.Scatter(
-            x=top_categories['Category'],
-            y=top_categories['Revenue'],
-            name='Est. Revenue ($)',
-            mode='lines+markers',
-            marker=dict(color='#E45756'),
-            yaxis='y2'
-        ))
-        
-        # Update layout
-        fig.update_layout(
-            title='Top Categories by Product Count and Estimated Revenue',
-            xaxis=dict(
-                title='Category',
-                tickangle=-45
-            ),
-            yaxis=dict(
-                title='Product Count',
-                titlefont=dict(color='#4C78A8'),
-                tickfont=dict(color='#4C78A8')
-            ),
-            yaxis2=dict(
-                title='Est. Revenue ($)',
-                titlefont=dict(color='#E45756'),
-                tickfont=dict(color='#E45756'),
-                anchor='x',
-                overlaying='y',
-                side='right'
-            ),
-            legend=dict(
-                orientation='h',
-                yanchor='bottom',
-                y=1.02,
-                xanchor='right',
-                x=1
-            ),
-            hovermode='x unified'
-        )
+        fig = _category_performance_figure(category_counts)
         
         st.plotly_chart(fig, use_container_width=True)
     except Exception as e:
         st.error(f"Error rendering category performance chart: {str(e)}")
 
+@st.cache_data(ttl=300, max_entries=16, show_spinner=False)
+def _price_distribution_figure(prices):
+    """Build the price distribution figure from an array of regular prices."""
+    # Bin on the server so the figure carries 20 bars instead of every price
+    counts, edges = np.histogram(prices, bins=20)
+    
+    # Precomputed box statistics; whiskers end at the furthest prices within 1.5 IQR
+    q1, median, q3 = np.percentile(prices, [25, 50, 75])
+    iqr = q3 - q1
+    lower_fence = prices[prices >= q1 - 1.5 * iqr].min()
+    upper_fence = prices[prices <= q3 + 1.5 * iqr].max()
+    mean_price = prices.mean()
+    
+    # Histogram with a box plot on the margin
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.2, 0.8], vertical_spacing=0.02)
+    fig.add_trace(go.Box(
+        q1=[q1], median=[median], q3=[q3], mean=[mean_price],
+        lowerfence=[lower_fence], upperfence=[upper_fence],
+        orientation='h',
+        name='',
+        marker_color='#3366CC',
+        showlegend=False
+    ), row=1, col=1)
+    fig.add_trace(go.Bar(
+        x=(edges[:-1] + edges[1:]) / 2,
+        y=counts,
+        customdata=np.column_stack([edges[:-1], edges[1:]]),
+        hovertemplate="$%{customdata[0]:.2f} - $%{customdata[1]:.2f}<br>%{y} products<extra></extra>",
+        marker_color='#3366CC',
+        showlegend=False
+    ), row=2, col=1)
+    
+    # Add mean line
+    fig.add_vline(x=mean_price, line_dash="dash", line_color="red", 
+                 annotation_text=f"Mean: ${mean_price:.2f}", 
+                 annotation_position="top right",
+                 row=2, col=1)
+    
+    # Update layout
+    fig.update_layout(
+        title="Product Price Distribution",
+        bargap=0.1
+    )
+    fig.update_xaxes(title_text="Price ($)", row=2, col=1)
+    fig.update_yaxes(title_text="Number of Products", row=2, col=1)
+    fig.update_yaxes(showticklabels=False, row=1, col=1)
+    
+    return fig
+
+@st.fragment
 def render_price_distribution_chart(df):
     """Render an enhanced price distribution chart."""
     try:
         if 'Regular price' not in df.columns:
             return
         
-        # Convert price columns to numeric
-        df['Regular price'] = pd.to_numeric(df['Regular price'], errors='coerce')
-        
-        # Drop NaN values
-        price_df = df.dropna(subset=['Regular price'])
+        # Prices are already numeric from load time; drop missing values
+        prices = df['Regular price'].dropna().to_numpy()
         
-        if len(price_df) == 0:
+        if len(prices) == 0:
             return
-            
-        # Create histogram with density curve
-        fig = px.histogram(
-            price_df, 
-            x='Regular price',
-            nbins=20,
-            title="Product Price Distribution",
-            labels={'Regular price': 'Price ($)', 'count': 'Number of Products'},
-            color_discrete_sequence=['#3366CC'],
-            marginal='box'  # Add a box plot on the margin
-        )
         
-        # Add mean line
-        mean_price = price_df['Regular price'].mean()
-        fig.add_vline(x=mean_price, line_dash="dash", line_color="red", 
-                     annotation_text=f"Mean: ${mean_price:.2f}", 
-                     annotation_position="top right")
-        
-        # Update layout
-        fig.update_layout(
-            xaxis_title="Price ($)",
-            yaxis_title="Number of Products",
-            bargap=0.1
-        )
+        fig = _price_distribution_figure(prices)
         
         st.plotly_chart(fig, use_container_width=True)
     except Exception as e:
         st.error(f"Error creating price distribution chart: {str(e)}")
 
+@st.cache_resource(show_spinner=False)
+def _gauge_template():
+    """Build the gauge figure once per process; callers copy it and set only the value."""
+    fig = go.Figure(go.Indicator(
+        mode="gauge+number",
+        title={'text': "Published Products (%)"},
+        gauge={
+            'axis': {'range': [0, 100]},
+            'bar': {'color': "#2E86C1"},
+            'steps': [
+                {'range': [0, 30], 'color': "#F1948A"},
+                {'range': [30, 70], 'color': "#F7DC6F"},
+                {'range': [70, 100], 'color': "#82E0AA"}
+            ],
+            'threshold': {
+                'line': {'color': "red", 'width': 4},
+                'thickness': 0.75,
+                'value': 90
+            }
+        }
+    ))
+    fig.update_layout(height=250)
+    
+    return fig
+
+@st.cache_data(ttl=300, max_entries=16, show_spinner=False)
+def _status_gauge_figure(pct_published):
+    """Build the published-products gauge for a given percentage."""
+    fig = go.Figure(_gauge_template())
+    fig.data[0].value = pct_published
+    
+    return fig
+
+@st.fragment
 def render_status_gauge_chart(df):
     """Render a gauge chart showing product status distribution."""
     try:
         if 'Status' not in df.columns:
             return
         
-        # Count status values
+        # Status is categorical, so counting is a pass over its integer codes; the
+        # figure itself is cached on the resulting percentage
         status_counts = df['Status'].value_counts()
         
         # Calculate percentage published
         total = status_counts.sum()
         pct_published = status_counts.get('Published', 0) / total * 100 if total > 0 else 0
         
-        # Create gauge chart
-        fig = go.Figure(go.Indicator(
-            mode="gauge+number",
-            value=pct_published,
-            title={'text': "Published Products (%)"},
-            gauge={
-                'axis': {'range': [0, 100]},
-                'bar': {'color': "#2E86C1"},
-                'steps': [
-                    {'range': [0, 30], 'color': "#F1948A"},
-                    {'range': [30, 70], 'color': "#F7DC6F"},
-                    {'range': [70, 100], 'color': "#82E0AA"}
-                ],
-                'threshold': {
-                    'line': {'color': "red", 'width': 4},
-                    'thickness': 0.75,
-                    'value': 90
-                }
-            }
-        ))
-        
-        fig.update_layout(height=250)
+        fig = _status_gauge_figure(float(pct_published))
         
         st.plotly_chart(fig, use_container_width=True)
     except Exception as e:
@@ -379,14 +471,27 @@ def render_dashboard_overview(df):
         # Product cards
         render_product_cards(df)
         
-        # Category performance chart
-        render_category_performance_chart(df)
-        
-        # Price distribution chart
-        render_price_distribution_chart(df)
+        # Detailed charts stay collapsed until the user opens them
+        with st.expander("Category & Price analytics", expanded=False):
+            # Category performance chart
+            render_category_performance_chart(df)
+            
+            # Price distribution chart
+            render_price_distribution_chart(df)
     except Exception as e:
         st.error(f"Error rendering dashboard overview: {str(e)}")
 
+@st.cache_data(ttl=600, max_entries=4, show_spinner="Parsing uploaded file...")
+def _parse_upload(raw, name):
+    """Read an uploaded product file based on its type."""
+    buffer = io.BytesIO(raw)
+    if name.endswith('.csv'):
+        return pd.read_csv(buffer)
+    elif name.endswith('.xlsx'):
+        return pd.read_excel(buffer)
+    else:  # JSON
+        return pd.read_json(buffer)
+
 def render_bulk_operations_ui(df, sheets):
     """Render UI for bulk operations."""
     try:
@@ -412,35 +517,26 @@ def render_bulk_operations_ui(df, sheets):
             # Update button
             if st.button("Update Status", use_container_width=True):
                 if selected_products and 'spreadsheet' in st.session_state:
+                    # Collect every selected row, then write them in one request
+                    name_to_index = get_name_to_index(df['Name'])
+                    product_indexes = [df.index[name_to_index[product_name]] for product_name in selected_products]
+                    success, message = sheets.batch_update_rows(
+                        st.session_state.spreadsheet,
+                        st.session_state.worksheet_index,
+                        [(product_index + 1, {'Status': new_status}) for product_index in product_indexes]  # +1 to account for header row
+                    )
+                    
                     success_count = 0
-                    for product_name in selected_products:
-                        try:
-                            # Find product index
-                            product_index = df[df['Name'] == product_name].index[0]
-                            
-                            # Get product data
-                            product_data = df.iloc[product_index].to_dict()
-                            
-                            # Update status
-                            product_data['Status'] = new_status
-                            
-                            # Update in Google Sheets
-                            success, _ = sheets.update_row(
-                                st.session_state.spreadsheet,
-                                st.session_state.worksheet_index,
-                                product_index + 1,  # +1 to account for header row
-                                product_data
-                            )
-                            
-                            if success:
-                                # Update local dataframe
-                                df.at[product_index, 'Status'] = new_status
-                                success_count += 1
-                        except Exception as e:
-                            st.error(f"Error updating product '{product_name}': {str(e)}")
+                    if success:
+                        # Update local dataframe; Status is categorical, so register the new value first
+                        add_missing_categories(df, 'Status', [new_status])
+                        df.loc[product_indexes, 'Status'] = new_status
+                        success_count = len(product_indexes)
+                    else:
+                        st.error(message)
                     
                     # Update session state
-                    st.session_state.current_data = df
+                    set_current_data(df)
                     
                     # Show success message
                     st.success(f"Updated status for {success_count} products")
@@ -454,11 +550,13 @@ def render_bulk_operations_ui(df, sheets):
             # Category filter
             if 'Categories' in df.columns:
                 try:
-                    categories = ['All'] + sorted(set([cat.strip() for cats in df['Categories'].dropna() for cat in str(cats).split(',')]))
+                    # Same category index as the Products Overview filter
+                    category_index = get_category_index(df)
+                    categories = ['All'] + list(category_index)
                     selected_category = st.selectbox("Filter by Category", categories)
                     
                     if selected_category != 'All':
-                        filtered_df = df[df['Categories'].str.contains(selected_category, case=False, na=False)]
+                        filtered_df = df.loc[category_index[selected_category]]
                     else:
                         filtered_df = df
                 except:
@@ -469,24 +567,26 @@ def render_bulk_operations_ui(df, sheets):
             # Price update options
             update_type = st.radio("Update Type", ["Percentage Change", "Fixed Amount Change", "Set to Value"])
             
+            # Every update type is new = current * factor + offset, decided once here
             if update_type == "Percentage Change":
                 percentage = st.number_input("Percentage Change (%)", value=10.0, step=1.0)
                 increase = st.radio("Direction", ["Increase", "Decrease"]) == "Increase"
+                factor, offset = (1 + percentage/100 if increase else 1 - percentage/100), 0.0
                 
                 # Preview calculation
-                st.caption("Example: $100 price would become " + 
-                          f"${100 * (1 + percentage/100) if increase else 100 * (1 - percentage/100):.2f}")
+                st.caption(f"Example: $100 price would become ${100 * factor + offset:.2f}")
                 
             elif update_type == "Fixed Amount Change":
                 amount = st.number_input("Amount ($)", value=5.0, step=1.0)
                 increase = st.radio("Direction", ["Increase", "Decrease"]) == "Increase"
+                factor, offset = 1.0, (amount if increase else -amount)
                 
                 # Preview calculation
-                st.caption("Example: $100 price would become " + 
-                          f"${100 + amount if increase else 100 - amount:.2f}")
+                st.caption(f"Example: $100 price would become ${100 * factor + offset:.2f}")
                 
             else:  # Set to Value
                 new_price = st.number_input("New Price ($)", value=99.99, step=1.0)
+                factor, offset = 0.0, new_price
             
             # Which price to update
             price_field = st.radio("Price Field to Update", ["Regular price", "Sale price", "Both"])
@@ -501,6 +601,7 @@ def render_bulk_operations_ui(df, sheets):
                         "Name": st.column_config.TextColumn("Product Name"),
                         "Regular price": st.column_config.NumberColumn("Regular Price", format="$%.2f"),
                         "Sale price": st.column_config.NumberColumn("Sale Price", format="$%.2f"),
+                        SEARCH_COLUMN: None,
                     },
                     hide_index=True,
                 )
@@ -510,66 +611,39 @@ def render_bulk_operations_ui(df, sheets):
             # Update button
             if st.button("Update Prices", use_container_width=True):
                 if len(filtered_df) > 0 and 'spreadsheet' in st.session_state:
-                    success_count = 0
+                    # Compute the new prices for whole columns at once; missing prices count as 0,
+                    # and results are rounded to cents so no float noise reaches the sheet
+                    price_cols = [
+                        col for col in ('Regular price', 'Sale price')
+                        if price_field in [col, "Both"] and col in filtered_df.columns
+                    ]
+                    new_prices = {
+                        col: np.round(np.clip(np.nan_to_num(filtered_df[col].to_numpy(dtype='float64')) * factor + offset, 0, None), 2)  # Ensure price is not negative
+                        for col in price_cols
+                    }
                     
-                    for idx, product in filtered_df.iterrows():
-                        try:
-                            # Get product data
-                            product_data = product.to_dict()
-                            
-                            # Update prices based on selected option
-                            if price_field in ["Regular price", "Both"] and 'Regular price' in product_data:
-                                try:
-                                    current_price = float(product_data['Regular price']) if pd.notna(product_data['Regular price']) and product_data['Regular price'] != '' else 0
-                                    
-                                    if update_type == "Percentage Change":
-                                        new_value = current_price * (1 + percentage/100) if increase else current_price * (1 - percentage/100)
-                                    elif update_type == "Fixed Amount Change":
-                                        new_value = current_price + amount if increase else current_price - amount
-                                    else:  # Set to Value
-                                        new_value = new_price
-                                        
-                                    product_data['Regular price'] = max(0, new_value)  # Ensure price is not negative
-                                except (ValueError, TypeError):
-                                    pass
-                            
-                            if price_field in ["Sale price", "Both"] and 'Sale price' in product_data:
-                                try:
-                                    current_price = float(product_data['Sale price']) if pd.notna(product_data['Sale price']) and product_data['Sale price'] != '' else 0
-                                    
-                                    if update_type == "Percentage Change":
-                                        new_value = current_price * (1 + percentage/100) if increase else current_price * (1 - percentage/100)
-                                    elif update_type == "Fixed Amount Change":
-                                        new_value = current_price + amount if increase else current_price - amount
-                                    else:  # Set to Value
-                                        new_value = new_price
-                                        
-                                    product_data['Sale price'] = max(0, new_value)  # Ensure price is not negative
-                                except (ValueError, TypeError):
-                                    pass
-                            
-                            # Update in Google Sheets
-                            success, _ = sheets.update_row(
-                                st.session_state.spreadsheet,
-                                st.session_state.worksheet_index,
-                                idx + 1,  # +1 to account for header row
-                                product_data
-                            )
-                            
-                            if success:
-                                # Update local dataframe
-                                if price_field in ["Regular price", "Both"] and 'Regular price' in product_data:
-                                    df.at[idx, 'Regular price'] = product_data['Regular price']
-                                
-                                if price_field in ["Sale price", "Both"] and 'Sale price' in product_data:
-                                    df.at[idx, 'Sale price'] = product_data['Sale price']
-                                    
-                                success_count += 1
-                        except Exception as e:
-                            st.error(f"Error updating product at index {idx}: {str(e)}")
+                    # Write every row in one request
+                    rows = [
+                        (idx + 1, {col: new_prices[col][i] for col in price_cols})  # +1 to account for header row
+                        for i, idx in enumerate(filtered_df.index)
+                    ]
+                    success, message = sheets.batch_update_rows(
+                        st.session_state.spreadsheet,
+                        st.session_state.worksheet_index,
+                        rows
+                    )
+                    
+                    success_count = 0
+                    if success:
+                        # Update local dataframe, one assignment per price column
+                        for col in price_cols:
+                            df.loc[filtered_df.index, col] = new_prices[col].astype(df[col].dtype)
+                        success_count = len(rows) if price_cols else 0
+                    else:
+                        st.error(message)
                     
                     # Update session state
-                    st.session_state.current_data = df
+                    set_current_data(df)
                     
                     # Show success message
                     st.success(f"Updated prices for {success_count} products")
@@ -587,9 +661,21 @@ def render_bulk_operations_ui(df, sheets):
             if st.button("Export All Products", use_container_width=True):
                 if 'current_data' in st.session_state and st.session_state.current_data is not None:
                     try:
+                        # Prices are rounded to cents so every format writes 19.99, not float noise
+                        export_df = df[visible_columns(df)].round({col: 2 for col in PRICE_COLUMNS})
+                        
                         # Create download button based on format
                         if export_format == "CSV":
-                            csv = df.to_csv(index=False)
+                            # Arrow's C++ CSV writer avoids pandas' per-row Python formatting. Imports can
+                            # leave text columns holding a mix of str and numbers, which Arrow rejects,
+                            # so those become strings first (missing values stay null)
+                            text_columns = {
+                                col: 'string' for col, dtype in export_df.dtypes.items()
+                                if dtype == object or (isinstance(dtype, pd.CategoricalDtype) and dtype.categories.dtype == object)
+                            }
+                            csv_buffer = pa.BufferOutputStream()
+                            pa_csv.write_csv(pa.Table.from_pandas(export_df.astype(text_columns), preserve_index=False), csv_buffer)
+                            csv = csv_buffer.getvalue().to_pybytes()
                             st.download_button(
                                 label="Download CSV",
                                 data=csv,
@@ -599,10 +685,11 @@ def render_bulk_operations_ui(df, sheets):
                             )
                         elif export_format == "Excel":
                             # For Excel, we need to use a BytesIO object
-                            import io
                             buffer = io.BytesIO()
-                            with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-                                df.to_excel(writer, index=False, sheet_name='Products')
+                            # No constant_memory: to_excel writes column by column, and that mode
+                            # would drop the earlier cells of every flushed row
+                            with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
+                                export_df.to_excel(writer, index=False, sheet_name='Products')
                             
                             st.download_button(
                                 label="Download Excel",
@@ -612,7 +699,7 @@ def render_bulk_operations_ui(df, sheets):
                                 use_container_width=True
                             )
                         else:  # JSON
-                            json_data = df.to_json(orient='records')
+                            json_data = orjson.dumps(export_df.to_dict(orient='records'), default=_json_default, option=orjson.OPT_SERIALIZE_NUMPY)
                             st.download_button(
                                 label="Download JSON",
                                 data=json_data,
@@ -633,13 +720,8 @@ def render_bulk_operations_ui(df, sheets):
             
             if uploaded_file is not None:
                 try:
-                    # Read the file based on its type
-                    if uploaded_file.name.endswith('.csv'):
-                        import_df = pd.read_csv(uploaded_file)
-                    elif uploaded_file.name.endswith('.xlsx'):
-                        import_df = pd.read_excel(uploaded_file)
-                    else:  # JSON
-                        import_df = pd.read_json(uploaded_file)
+                    # Parsed once per file content; reruns while the file stays uploaded hit the cache
+                    import_df = _parse_upload(uploaded_file.getvalue(), uploaded_file.name)
                     
                     # Show preview of data to be imported
                     st.write(f"Preview of data to be imported ({len(import_df)} products):")
@@ -648,41 +730,23 @@ def render_bulk_operations_ui(df, sheets):
                     # Import button
                     if st.button("Import Products", use_container_width=True):
                         if 'spreadsheet' in st.session_state:
-                            success_count = 0
+                            # Remove any record_id as it should be auto-generated
+                            products = import_df.drop(columns=['record_id'], errors='ignore')
                             
-                            # Process each row
-                            for _, row in import_df.iterrows():
-                                try:
-                                    product_data = row.to_dict()
-                                    
-                                    # Remove any record_id as it should be auto-generated
-                                    if 'record_id' in product_data:
-                                        del product_data['record_id']
-                                    
-                                    # Add to Google Sheets
-                                    success, _ = sheets.add_row(
-                                        st.session_state.spreadsheet,
-                                        st.session_state.worksheet_index,
-                                        product_data
-                                    )
-                                    
-                                    if success:
-                                        success_count += 1
-                                except Exception as e:
-                                    st.error(f"Error importing row: {str(e)}")
-                            
-                            # Reload data to include the new products
-                            if success_count > 0:
-                                df_new, msg = sheets.get_worksheet_data(
-                                    st.session_state.spreadsheet, 
-                                    st.session_state.worksheet_index
+                            if not products.empty:
+                                # Add all rows to Google Sheets in one request
+                                success, message = sheets.add_rows(
+                                    st.session_state.spreadsheet,
+                                    st.session_state.worksheet_index,
+                                    products
                                 )
-                                if df_new is not None:
-                                    st.session_state.current_data = df_new
-                                    st.success(f"Successfully imported {success_count} products")
-                                    st.experimental_rerun()
+                                
+                                if success:
+                                    # Append the imported products locally instead of reloading the sheet
+                                    set_current_data(append_products(df, products))
+                                    st.success(f"Successfully imported {len(products)} products")
                                 else:
-                                    st.error(f"Error reloading data: {msg}")
+                                    st.error(message)
                             else:
                                 st.error("No products were imported")
                         else:
@@ -2,10 +2,118 @@ import openai
 import streamlit as st
 import os
 import json
+import orjson
+import ijson
+import tiktoken
+import hashlib
+import asyncio
+import sqlite3
+import time
+import threading
+from contextlib import closing, contextmanager
+import httpx
+import numpy as np
+
+# Chat model for product generation and description improvement
+CHAT_MODEL = "gpt-4o-mini"
+
+# JSON mode makes the model return a bare JSON object, without markdown fences
+PRODUCT_RESPONSE_FORMAT = {"type": "json_object"}
+
+# Embedding model and cosine similarity thresholds for the semantic caches
+EMBEDDING_MODEL = "text-embedding-3-small"
+SEMANTIC_CACHE_THRESHOLD = 0.95
+DESCRIPTION_CACHE_THRESHOLD = 0.92
+
+# Most completions kept in each session's exact-match response cache
+RESPONSE_CACHE_SIZE = 512
+
+# Opt-in on-disk response cache shared across sessions and restarts; responses are
+# sampled at temperature 0.7, so reusing them is the caller's choice
+RESPONSE_DB_PATH = os.path.join('.cache', 'llm_responses.sqlite')
+RESPONSE_DB_TTL = 86400  # seconds
+
+# Maximum number of OpenAI requests in flight during batch generation, and retries
+# (with the client's exponential backoff) for rate-limited or failed requests
+BATCH_CONCURRENCY = 8
+BATCH_MAX_RETRIES = 5
+
+# Retries (with the client's exponential backoff and jitter) and per-request
+# timeout for interactive requests
+OPENAI_MAX_RETRIES = 3
+OPENAI_TIMEOUT = 30.0  # seconds
+
+# Transient failures in a row for one API key after which its OpenAI calls fail fast,
+# and for how long
+CIRCUIT_BREAKER_THRESHOLD = 5
+CIRCUIT_BREAKER_COOLDOWN = 30  # seconds
+
+# Errors that point at a degraded backend rather than a bad request; transport errors
+# can surface unwrapped while a stream is being read
+TRANSIENT_ERRORS = (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError, httpx.TransportError)
+
+# Batch API statuses after which a batch will never produce output, and the
+# seconds between automatic checks of a pending batch
+BATCH_FAILED_STATUSES = ("failed", "expired", "cancelled")
+BATCH_POLL_INTERVAL = 10
+
+# Most tokens of a current description sent for improvement; longer ones are truncated
+DESCRIPTION_TOKEN_BUDGET = 1500
+
+# Prompts are built once at import time and filled in with str.format per request;
+# the text is unchanged, so cache keys of earlier requests still match
+PRODUCT_SYSTEM_MESSAGE = {"role": "system", "content": "You are a product creation assistant that generates detailed e-commerce product listings. Respond only with valid JSON."}
+PRODUCT_PROMPT_TEMPLATE = """
+        Create a detailed e-commerce product based on the following specifications:
+        
+        Product Type: {product_type}
+        Target Audience: {target_audience}
+        Price Range: {price_range}
+        
+        Additional Features/Requirements: {features}
+        
+        Please provide the following details in JSON format:
+        1. Name: A catchy product name
+        2. Description: A detailed product description (2-3 paragraphs)
+        3. Short description: A brief one-line description
+        4. Regular price: A specific price within the given range
+        5. URL Slug: SEO-friendly URL (lowercase, hyphens instead of spaces)
+        6. Categories: Appropriate product categories (comma-separated)
+        7. Status: "Draft"
+        
+        Format the response as valid JSON with these exact field names.
+        """
+
+IMPROVE_SYSTEM_MESSAGE = {"role": "system", "content": "You are a copywriting expert that improves product descriptions."}
+IMPROVE_PROMPT_TEMPLATE = """
+        Improve the following product description for "{product_name}":
+        
+        Current Description:
+        {current_description}
+        
+        Please provide an enhanced, more compelling product description that:
+        1. Highlights key benefits and features
+        2. Uses persuasive language
+        3. Maintains the same general information
+        4. Is SEO-friendly
+        5. Is approximately the same length
+        
+        Return only the improved description text.
+        """
 
 class OpenAIIntegration:
     def __init__(self):
         """Initialize OpenAI integration."""
+        # Exact-match response cache counters, shared by all sessions
+        self.stats = {'hits': 0, 'misses': 0}
+        # Circuit breaker state per API key digest: [consecutive failures, time of last failure].
+        # Rate limits and quotas are per key, so one key's failures never block another's
+        self._breakers = {}
+        self._breaker_lock = threading.Lock()
+        self.init_session_state()
+    
+    def init_session_state(self):
+        """Initialize the session state used by the integration."""
         # Check if API key exists in session state
         if 'openai_api_key' not in st.session_state:
             # Try to get from environment variable
@@ -28,97 +136,466 @@ class OpenAIIntegration:
         """Check if OpenAI API is configured."""
         return bool(st.session_state.openai_api_key)
     
-    def generate_product(self, product_type, target_audience, price_range, features=None):
-        """Generate a new product using OpenAI."""
+    def _client(self):
+        """Return the session's client, which retries transient failures.
+        
+        The client is reused across calls so its connection pool skips the TLS
+        handshake; it is replaced when the API key changes.
+        """
+        api_key = st.session_state.openai_api_key
+        cached = st.session_state.get('openai_client')
+        if cached is not None and cached[0] == api_key:
+            return cached[1]
+        
+        if cached is not None:
+            cached[1].close()
+        client = openai.OpenAI(api_key=api_key, max_retries=OPENAI_MAX_RETRIES, timeout=OPENAI_TIMEOUT)
+        st.session_state.openai_client = (api_key, client)
+        return client
+    
+    @contextmanager
+    def _circuit(self):
+        """Run a block of OpenAI calls through the circuit breaker of the session's API key.
+        
+        After CIRCUIT_BREAKER_THRESHOLD transient failures in a row, calls with that key
+        fail at once for CIRCUIT_BREAKER_COOLDOWN seconds instead of waiting on a
+        degraded backend. Failures raised while reading a stream inside the block count too.
+        """
+        key = hashlib.blake2b(st.session_state.openai_api_key.encode("utf-8"), digest_size=16).digest()
+        with self._breaker_lock:
+            state = self._breakers.get(key)
+            if (state is not None and state[0] >= CIRCUIT_BREAKER_THRESHOLD
+                    and time.monotonic() - state[1] < CIRCUIT_BREAKER_COOLDOWN):
+                raise RuntimeError("OpenAI is temporarily unavailable, please try again shortly")
+        
+        try:
+            yield
+        except TRANSIENT_ERRORS:
+            with self._breaker_lock:
+                state = self._breakers.setdefault(key, [0, 0.0])
+                state[0] += 1
+                state[1] = time.monotonic()
+            raise
+        
+        with self._breaker_lock:
+            self._breakers.pop(key, None)
+    
+    def _call_api(self, create, **kwargs):
+        """Call an OpenAI endpoint through the circuit breaker; see _circuit."""
+        with self._circuit():
+            return create(**kwargs)
+    
+    def _build_product_messages(self, product_type, target_audience, price_range, features=None):
+        """Build the chat messages for a product generation request."""
+        prompt = PRODUCT_PROMPT_TEMPLATE.format(
+            product_type=product_type,
+            target_audience=target_audience,
+            price_range=price_range,
+            features=features if features else 'None specified'
+        )
+        return [PRODUCT_SYSTEM_MESSAGE, {"role": "user", "content": prompt}]
+    
+    def parse_product(self, result):
+        """Parse the JSON product returned by the model."""
+        # Product requests use JSON mode, so the text is a bare JSON object
+        return orjson.loads(result)
+    
+    def _response_key(self, model, messages, temperature, max_tokens):
+        """Return the exact-match cache key of a chat completion request."""
+        # repr of a plain tuple is canonical, so no JSON round-trip or key sorting is needed
+        payload = (model, temperature, max_tokens, tuple((m["role"], m["content"]) for m in messages))
+        return hashlib.blake2b(repr(payload).encode("utf-8"), digest_size=16).hexdigest()
+    
+    def _cached_response(self, key, persistent_cache=False):
+        """Return the cached completion text for a request key, counting the hit or miss.
+        
+        With persistent_cache, responses saved on disk by earlier sessions are used too.
+        """
+        cache = st.session_state.get('chat_response_cache') or {}
+        text = cache.get(key)
+        if text is None and persistent_cache:
+            text = _read_response_db(key)
+        self.stats['hits' if text is not None else 'misses'] += 1
+        return text
+    
+    def _store_response(self, key, text, persistent_cache=False):
+        """Remember a completion text under its request key, dropping the oldest beyond the limit."""
+        cache = st.session_state.setdefault('chat_response_cache', {})
+        cache[key] = text
+        while len(cache) > RESPONSE_CACHE_SIZE:
+            del cache[next(iter(cache))]
+        if persistent_cache:
+            _write_response_db(key, text)
+    
+    def _embed(self, client, text):
+        """Return the normalized embedding of a text, or None if it could not be computed."""
+        # An embedding failure only skips the semantic cache
+        try:
+            response = self._call_api(client.embeddings.create, model=EMBEDDING_MODEL, input=text)
+        except Exception:
+            return None
+        embedding = np.asarray(response.data[0].embedding, dtype=np.float32)
+        return embedding / np.linalg.norm(embedding)
+    
+    def _semantic_lookup(self, embedding, cache_name='product_semantic_cache', threshold=SEMANTIC_CACHE_THRESHOLD, tag=None):
+        """Return a cached value whose input is near-identical to the embedded one.
+        
+        Only values stored with the same tag are considered.
+        """
+        cache = st.session_state.get(cache_name)
+        if not cache or not cache['values'] or 'tags' not in cache:
+            return None
+        
+        # Embeddings are normalized, so one matrix-vector product gives every cosine similarity
+        similarities = cache['embeddings'][:len(cache['values'])] @ embedding
+        similarities[np.array([t != tag for t in cache['tags']], dtype=bool)] = -np.inf
+        best = int(np.argmax(similarities))
+        if similarities[best] > threshold:
+            return cache['values'][best]
+        return None
+    
+    def _semantic_store(self, embedding, value, cache_name='product_semantic_cache', tag=None):
+        """Remember a value under the embedding of its input and an exact-match tag."""
+        cache = st.session_state.get(cache_name)
+        if not cache or 'tags' not in cache:
+            cache = {'embeddings': np.empty((16, embedding.size), dtype=np.float32), 'values': [], 'tags': []}
+            st.session_state[cache_name] = cache
+        
+        # Grow the buffer by doubling so inserts don't copy every stored embedding
+        size = len(cache['values'])
+        if size == len(cache['embeddings']):
+            grown = np.empty((2 * size, embedding.size), dtype=np.float32)
+            grown[:size] = cache['embeddings']
+            cache['embeddings'] = grown
+        
+        cache['embeddings'][size] = embedding
+        cache['values'].append(value)
+        cache['tags'].append(tag)
+    
+    def generate_product_variants(self, product_type, target_audience, price_range, features=None, n=5):
+        """Generate n alternative products for the same spec in a single request."""
         if not self.is_configured():
             return None, "OpenAI API key not configured"
         
         try:
-            # Prepare the prompt
-            prompt = f"""
-            Create a detailed e-commerce product based on the following specifications:
-            
-            Product Type: {product_type}
-            Target Audience: {target_audience}
-            Price Range: {price_range}
-            
-            Additional Features/Requirements: {features if features else 'None specified'}
+            messages = self._build_product_messages(product_type, target_audience, price_range, features)
+            client = self._client()
             
-            Please provide the following details in JSON format:
-            1. Name: A catchy product name
-            2. Description: A detailed product description (2-3 paragraphs)
-            3. Short description: A brief one-line description
-            4. Regular price: A specific price within the given range
-            5. URL Slug: SEO-friendly URL (lowercase, hyphens instead of spaces)
-            6. Categories: Appropriate product categories (comma-separated)
-            7. Status: "Draft"
-            
-            Format the response as valid JSON with these exact field names.
-            """
-            
-            # Call OpenAI API
-            client = openai.OpenAI(api_key=st.session_state.openai_api_key)
-            response = client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "You are a product creation assistant that generates detailed e-commerce product listings. Respond only with valid JSON."},
-                    {"role": "user", "content": prompt}
-                ],
+            # n completions share one prompt, so input tokens and the request are counted once
+            response = self._call_api(
+                client.chat.completions.create,
+                model=CHAT_MODEL,
+                messages=messages,
                 temperature=0.7,
-                max_tokens=1000
+                max_tokens=1000,
+                n=n,
+                response_format=PRODUCT_RESPONSE_FORMAT
             )
             
-            # Extract and parse the JSON response
-            result = response.choices[0].message.content.strip()
-            
-            # Clean up the response to ensure it's valid JSON
-            # Remove any markdown code block indicators
-            result = result.replace("```json", "").replace("```", "").strip()
+            # Keep every variant that parsed, in the order returned
+            variants = []
+            for choice in response.choices:
+                try:
+                    variants.append(self.parse_product(choice.message.content))
+                except ValueError:
+                    pass
             
-            product_data = json.loads(result)
-            
-            return product_data, "Product generated successfully"
+            return variants, f"{len(variants)} variants generated successfully"
         except Exception as e:
-            return None, f"Error generating product: {str(e)}"
+            return None, f"Error generating variants: {str(e)}"
+    
+    async def _agenerate_one(self, client, product_type, target_audience, price_range, features=None):
+        """Generate one product with an async client and parse it."""
+        messages = self._build_product_messages(product_type, target_audience, price_range, features)
+        
+        # Call OpenAI API without blocking the event loop
+        response = await client.chat.completions.create(
+            model=CHAT_MODEL,
+            messages=messages,
+            temperature=0.7,
+            max_tokens=1000,
+            response_format=PRODUCT_RESPONSE_FORMAT
+        )
+        
+        # Extract and parse the JSON response
+        return self.parse_product(response.choices[0].message.content)
     
-    def improve_product_description(self, product_name, current_description):
-        """Improve an existing product description."""
+    async def generate_products_batch(self, product_types, target_audience, price_range, features=None, on_progress=None):
+        """Generate one product per product type concurrently.
+        
+        Returns the products in input order, with None for failed requests.
+        on_progress(completed, total) is called as each request finishes.
+        """
+        if not self.is_configured():
+            return [None] * len(product_types)
+        
+        semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+        
+        # One client for the whole batch, so every request shares its connection pool
+        async with openai.AsyncOpenAI(api_key=st.session_state.openai_api_key, max_retries=BATCH_MAX_RETRIES) as client:
+            async def generate(i, product_type):
+                async with semaphore:
+                    try:
+                        return i, await self._agenerate_one(client, product_type, target_audience, price_range, features)
+                    except Exception:
+                        return i, None
+            
+            # Collect results by position so the batch keeps the input order
+            results = [None] * len(product_types)
+            tasks = [generate(i, product_type) for i, product_type in enumerate(product_types)]
+            for completed, task in enumerate(asyncio.as_completed(tasks), start=1):
+                i, product_data = await task
+                results[i] = product_data
+                if on_progress:
+                    on_progress(completed, len(tasks))
+        
+        return results
+    
+    def submit_product_batch(self, product_types, target_audience, price_range, features=None):
+        """Submit product generation requests through the OpenAI Batch API."""
         if not self.is_configured():
             return None, "OpenAI API key not configured"
         
         try:
-            # Prepare the prompt
-            prompt = f"""
-            Improve the following product description for "{product_name}":
+            # Build one JSONL request line per product type
+            lines = []
+            for i, product_type in enumerate(product_types):
+                lines.append(json.dumps({
+                    "custom_id": f"prod-{i}",
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": {
+                        "model": CHAT_MODEL,
+                        "messages": self._build_product_messages(product_type, target_audience, price_range, features),
+                        "temperature": 0.7,
+                        "max_tokens": 1000,
+                        "response_format": PRODUCT_RESPONSE_FORMAT
+                    }
+                }))
             
-            Current Description:
-            {current_description}
+            # Upload the requests and create the batch
+            client = self._client()
+            batch_file = client.files.create(
+                file=("product_batch.jsonl", "\n".join(lines).encode("utf-8")),
+                purpose="batch"
+            )
+            batch = client.batches.create(
+                input_file_id=batch_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h"
+            )
             
-            Please provide an enhanced, more compelling product description that:
-            1. Highlights key benefits and features
-            2. Uses persuasive language
-            3. Maintains the same general information
-            4. Is SEO-friendly
-            5. Is approximately the same length
+            return batch.id, "Batch submitted successfully"
+        except Exception as e:
+            return None, f"Error submitting batch: {str(e)}"
+    
+    def poll_batch(self, batch_id):
+        """Check a submitted batch and return its products once completed."""
+        if not self.is_configured():
+            return None, None, "OpenAI API key not configured"
+        
+        try:
+            client = self._client()
+            batch = client.batches.retrieve(batch_id)
             
-            Return only the improved description text.
-            """
+            if batch.status != "completed":
+                return batch.status, None, f"Batch is {batch.status}"
             
-            # Call OpenAI API
-            client = openai.OpenAI(api_key=st.session_state.openai_api_key)
-            response = client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "You are a copywriting expert that improves product descriptions."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=500
-            )
+            # When every request failed there is no output file, only an error file
+            if not batch.output_file_id:
+                return batch.status, [], f"Every request in the batch failed: {self._batch_error(client, batch)}"
+            
+            # Parse the output file, keeping the original request order
+            results = []
+            output = client.files.content(batch.output_file_id).text
+            for line in output.splitlines():
+                if not line.strip():
+                    continue
+                record = orjson.loads(line)
+                response = record.get("response") or {}
+                if response.get("status_code") != 200:
+                    continue
+                try:
+                    content = response["body"]["choices"][0]["message"]["content"]
+                    position = int(record["custom_id"].rsplit("-", 1)[-1])
+                    results.append((position, self.parse_product(content)))
+                except (KeyError, IndexError, ValueError):
+                    pass
             
-            # Extract the improved description
-            improved_description = response.choices[0].message.content.strip()
+            products = [product for _, product in sorted(results, key=lambda r: r[0])]
             
-            return improved_description, "Description improved successfully"
+            return batch.status, products, f"Batch completed with {len(products)} products"
+        except Exception as e:
+            return None, None, f"Error checking batch: {str(e)}"
+    
+    def _batch_error(self, client, batch):
+        """Return the first error message recorded for a batch's failed requests."""
+        if not batch.error_file_id:
+            return "no error details were returned"
+        
+        # The batch is finished either way, so a failure to read the details is not fatal
+        try:
+            for line in client.files.content(batch.error_file_id).text.splitlines():
+                if not line.strip():
+                    continue
+                record = orjson.loads(line)
+                error = record.get("error") or ((record.get("response") or {}).get("body") or {}).get("error") or {}
+                if error.get("message"):
+                    return error["message"]
         except Exception as e:
-            return None, f"Error improving description: {str(e)}"
+            return f"error details could not be read ({str(e)})"
+        return "no error details were returned"
+    
+    def _build_improve_messages(self, product_name, current_description):
+        """Build the chat messages for a description improvement request."""
+        prompt = IMPROVE_PROMPT_TEMPLATE.format(
+            product_name=product_name,
+            current_description=_truncate_to_budget(current_description, DESCRIPTION_TOKEN_BUDGET)
+        )
+        return [IMPROVE_SYSTEM_MESSAGE, {"role": "user", "content": prompt}]
+    
+    def _stream_completion(self, client, messages, max_tokens, response_format=openai.NOT_GIVEN):
+        """Yield the text of a chat completion as it is generated."""
+        # The breaker covers reading the stream, not just opening it
+        with self._circuit():
+            stream = client.chat.completions.create(
+                model=CHAT_MODEL,
+                messages=messages,
+                temperature=0.7,
+                max_tokens=max_tokens,
+                response_format=response_format,
+                stream=True
+            )
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+    
+    def generate_product_stream(self, product_type, target_audience, price_range, features=None, persistent_cache=False):
+        """Stream the JSON text of a new product; parse it with iter_product_fields or parse_product."""
+        messages = self._build_product_messages(product_type, target_audience, price_range, features)
+        
+        # An identical earlier request is served before paying for an embedding
+        key = self._response_key(CHAT_MODEL, messages, 0.7, 1000)
+        cached_text = self._cached_response(key, persistent_cache)
+        if cached_text is not None:
+            yield cached_text
+            return
+        
+        client = self._client()
+        
+        # Serve a semantically similar earlier product at once if there is one. Only the
+        # spec is embedded, since the templated prompt around it would make different specs
+        # look near-identical, and the price range has to match exactly
+        embedding = self._embed(client, f"{product_type}\n{target_audience}\n{features or ''}")
+        if embedding is not None:
+            cached_product = self._semantic_lookup(embedding, tag=price_range)
+            if cached_product is not None:
+                yield json.dumps(cached_product, indent=2)
+                return
+        
+        chunks = []
+        for text in self._stream_completion(client, messages, 1000, PRODUCT_RESPONSE_FORMAT):
+            chunks.append(text)
+            yield text
+        
+        # Only a complete, valid product is cached; a truncated or malformed
+        # response would otherwise be replayed on every retry
+        full_text = "".join(chunks)
+        try:
+            product_data = self.parse_product(full_text)
+        except ValueError:
+            return
+        
+        self._store_response(key, full_text, persistent_cache)
+        if embedding is not None:
+            self._semantic_store(embedding, product_data, tag=price_range)
+    
+    def improve_product_description_stream(self, product_name, current_description, persistent_cache=False):
+        """Stream an improved product description as it is generated."""
+        messages = self._build_improve_messages(product_name, current_description)
+        
+        # Reuse the answer to an identical earlier request
+        key = self._response_key(CHAT_MODEL, messages, 0.7, 500)
+        cached_text = self._cached_response(key, persistent_cache)
+        if cached_text is not None:
+            yield cached_text
+            return
+        
+        # Reuse the improvement of a near-identical description
+        client = self._client()
+        embedding = self._embed(client, f"{product_name}\n{current_description}")
+        if embedding is not None:
+            cached_text = self._semantic_lookup(embedding, 'description_semantic_cache', DESCRIPTION_CACHE_THRESHOLD)
+            if cached_text is not None:
+                yield cached_text
+                return
+        
+        chunks = []
+        for text in self._stream_completion(client, messages, 500):
+            chunks.append(text)
+            yield text
+        
+        full_text = "".join(chunks)
+        self._store_response(key, full_text, persistent_cache)
+        if embedding is not None:
+            self._semantic_store(embedding, full_text, 'description_semantic_cache')
+
+def _read_response_db(key):
+    """Return a fresh response saved on disk for a request key, or None."""
+    try:
+        with closing(sqlite3.connect(RESPONSE_DB_PATH)) as conn:
+            row = conn.execute(
+                "SELECT text FROM responses WHERE key = ? AND created > ?",
+                (key, time.time() - RESPONSE_DB_TTL)
+            ).fetchone()
+        return row[0] if row else None
+    except sqlite3.Error:
+        return None
+
+def _write_response_db(key, text):
+    """Save a response on disk under its request key; the disk cache is best effort."""
+    try:
+        os.makedirs(os.path.dirname(RESPONSE_DB_PATH), exist_ok=True)
+        with closing(sqlite3.connect(RESPONSE_DB_PATH)) as conn, conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, text TEXT, created REAL)")
+            conn.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?)", (key, text, time.time()))
+    except (sqlite3.Error, OSError):
+        pass
+
+@st.cache_resource(show_spinner=False)
+def _chat_encoding():
+    # Loading the tokenizer is slow the first time, so it is shared by all sessions
+    return tiktoken.encoding_for_model(CHAT_MODEL)
+
+def _truncate_to_budget(text, budget):
+    """Return the text cut down to at most budget tokens of the chat model."""
+    # Every token covers at least one byte, so short texts never need encoding
+    if len(text.encode("utf-8")) <= budget:
+        return text
+    encoding = _chat_encoding()
+    tokens = encoding.encode(text)
+    if len(tokens) <= budget:
+        return text
+    return encoding.decode(tokens[:budget])
+
+def iter_product_fields(chunks):
+    """Parse streamed product JSON text incrementally, yielding (field, value) as each top-level field completes."""
+    # ijson's push parser takes the text as it arrives, so fields can be shown before the response ends
+    fields = ijson.sendable_list()
+    parser = ijson.kvitems_coro(fields, '', use_float=True)
+    for chunk in chunks:
+        parser.send(chunk.encode("utf-8"))
+        yield from fields
+        del fields[:]
+    parser.close()
+    yield from fields
+
+@st.cache_resource
+def _shared_openai_integration():
+    return OpenAIIntegration()
+
+def get_openai_integration():
+    """Return the shared OpenAI integration, initialized for the current session."""
+    integration = _shared_openai_integration()
+    integration.init_session_state()
+    return integration
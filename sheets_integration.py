@@ -1,36 +1,273 @@
 import gspread
-from oauth2client.service_account import ServiceAccountCredentials
+from google.oauth2.service_account import Credentials
+from google.auth.transport.requests import AuthorizedSession
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError as HTTPConnectionError, Timeout as HTTPTimeout
+from urllib3.util.retry import Retry
 import pandas as pd
+import numpy as np
 import streamlit as st
-import json
+import orjson
 import os
 import tempfile
+import hashlib
+import time
+import threading
+from contextlib import contextmanager
+
+# Price columns parsed to float64 at load time; float32 cannot hold cents exactly
+PRICE_COLUMNS = ('Regular price', 'Sale price')
+
+# Low-cardinality text columns stored as pandas categoricals
+CATEGORICAL_COLUMNS = ('Status', 'Categories', 'Tax status', 'Stock status')
+
+# Text columns stored as Arrow-backed strings, which st.dataframe serializes without conversion
+STRING_COLUMNS = ('Name',)
+
+# Hidden column holding the lowercased search text of each product
+SEARCH_COLUMN = '_search_blob'
+
+# OAuth scopes requested for the service account
+SCOPES = ['https://spreadsheets.google.com/feeds',
+          'https://www.googleapis.com/auth/drive']
+
+# HTTP statuses of Sheets requests that are retried before an error is reported
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Transient failures in a row for one set of credentials after which Sheets writes
+# fail fast, and for how long
+CIRCUIT_BREAKER_THRESHOLD = 5
+CIRCUIT_BREAKER_COOLDOWN = 30  # seconds
+
+# Seconds a worksheet's header row is reused before it is fetched again
+HEADERS_TTL = 300
+
+# Loaded worksheets are also kept on disk as Parquet so warm reloads skip the Sheets fetch
+LOCAL_CACHE_DIR = '.cache'
+LOCAL_CACHE_MAX_AGE = 3600  # seconds
+LOCAL_CACHE_VERSION = 2  # bump when stored dtypes change so older files are ignored
+
+class _SheetsRetry(Retry):
+    """Retry policy that also retries writes (POST) when they are rate limited.
+    
+    A 429 means the request was rejected before it was applied, so retrying an
+    append or batch update cannot duplicate it; other errors on writes are not retried.
+    """
+    def is_retry(self, method, status_code, has_retry_after=False):
+        if method.upper() == "POST":
+            return bool(self.total) and status_code == 429
+        return super().is_retry(method, status_code, has_retry_after)
+
+def _is_transient(error):
+    """Return whether a Sheets error points at a degraded backend rather than a bad request."""
+    if isinstance(error, (HTTPConnectionError, HTTPTimeout)):
+        return True
+    return isinstance(error, gspread.exceptions.APIError) and getattr(error, 'code', None) in RETRY_STATUSES
+
+def _cell_value(value):
+    """Convert a DataFrame value into one the Sheets API can serialize."""
+    if value is None or value is pd.NA:
+        return ""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and np.isnan(value):
+        return ""
+    return value
+
+def _sheet_rows(rows, headers):
+    """Return product dicts or a DataFrame as lists of cell values ordered by headers.
+    
+    Missing columns and missing values become ""; one reindex aligns every row at once.
+    """
+    aligned = pd.DataFrame(rows).reindex(columns=headers, fill_value="").astype(object)
+    return aligned.where(aligned.notna(), "").to_numpy().tolist()
+
+def optimize_dtypes(df):
+    """Parse prices as float64 and store text columns as categoricals or Arrow strings.
+    
+    Prices are left at float64: they are written back to the sheet, and
+    float32 would turn 19.99 into 19.989999771118164.
+    """
+    for col in PRICE_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype('float64')
+    
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    
+    for col in STRING_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('string[pyarrow]')
+    
+    return df
+
+def add_missing_categories(df, col, values):
+    """Extend a categorical column so the given values can be assigned to it."""
+    if isinstance(df[col].dtype, pd.CategoricalDtype):
+        categories = df[col].cat.categories
+        missing = [v for v in dict.fromkeys(values) if not pd.isna(v) and v not in categories]
+        if missing:
+            df[col] = df[col].cat.add_categories(missing)
+
+def add_search_column(df, index=None):
+    """Store lowercased Name and Description in a hidden column used by product search.
+    
+    Pass index to refresh only the given rows after an edit.
+    """
+    rows = df if index is None else df.loc[index]
+    blob = pd.Series('', index=rows.index)
+    for col in ('Name', 'Description'):
+        if col in rows.columns:
+            blob = blob + rows[col].fillna('').astype(str) + '\x1f'
+    
+    if index is None:
+        df[SEARCH_COLUMN] = blob.str.lower()
+    else:
+        df.loc[rows.index, SEARCH_COLUMN] = blob.str.lower()
+    return df
+
+def visible_columns(df):
+    """Return the sheet columns of a product DataFrame, without internal helper columns."""
+    return [col for col in df.columns if col != SEARCH_COLUMN]
+
+def append_products(df, products):
+    """Return the DataFrame with the given product dicts appended, matching its columns."""
+    new_rows = pd.DataFrame(products).reindex(columns=visible_columns(df), fill_value="")
+    new_rows = add_search_column(new_rows)
+    return optimize_dtypes(pd.concat([df, new_rows], ignore_index=True))
+
+def set_current_data(df):
+    """Store df as the session's product data and bump the data version.
+    
+    Call it whenever product rows are replaced or edited; the version keys the
+    product memos, so they are rebuilt without hashing the data on every rerun.
+    """
+    st.session_state.current_data = df
+    st.session_state.data_version = data_version() + 1
+
+def data_version():
+    """Return the version of the session's product data, for memo keys."""
+    return st.session_state.get('data_version', 0)
+
+def get_category_index(df):
+    """Map each category to the index labels of the products listed under it.
+    
+    Keys are in sorted order. Memoized in session state per data version;
+    see set_current_data.
+    """
+    key = data_version()
+    cached = st.session_state.get('category_index')
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    
+    cat_index = {}
+    for i, cats in df['Categories'].dropna().items():
+        for cat in map(str.strip, str(cats).split(',')):
+            if cat:
+                cat_index.setdefault(cat, []).append(i)
+    cat_index = dict(sorted(cat_index.items()))
+    
+    st.session_state.category_index = (key, cat_index)
+    return cat_index
 
 class GoogleSheetsIntegration:
     def __init__(self):
         """Initialize Google Sheets integration with OAuth or API key."""
+        # Circuit breaker state per credentials digest: [consecutive failures, time of last failure]
+        self._breakers = {}
+        self._breaker_lock = threading.Lock()
+        self.init_session_state()
+    
+    def init_session_state(self):
+        """Initialize the session state used by the integration."""
         # Check if credentials exist in session state
         if 'gsheets_creds' not in st.session_state:
             st.session_state.gsheets_creds = None
             st.session_state.gsheets_client = None
+            st.session_state.gsheets_creds_key = None
+        
+        # Worksheet handles and header rows reused across operations in this session
+        if 'gsheets_worksheets' not in st.session_state:
+            st.session_state.gsheets_worksheets = {}
+            st.session_state.gsheets_headers = {}
+    
+    def _get_worksheet(self, spreadsheet, worksheet_index):
+        """Return a worksheet handle, fetching it only the first time it is used in this session."""
+        key = (spreadsheet.id, worksheet_index, st.session_state.gsheets_creds_key)
+        worksheet = st.session_state.gsheets_worksheets.get(key)
+        if worksheet is None:
+            worksheet = spreadsheet.get_worksheet(worksheet_index)
+            st.session_state.gsheets_worksheets[key] = worksheet
+        return worksheet
+    
+    def _remember_headers(self, worksheet, headers):
+        """Store a worksheet's header row, without the trailing blank cells row_values drops."""
+        headers = list(headers)
+        while headers and headers[-1] == "":
+            headers.pop()
+        st.session_state.gsheets_headers[(worksheet.spreadsheet_id, worksheet.id)] = (time.time(), headers)
+        return headers
+    
+    def _get_headers(self, worksheet):
+        """Return the worksheet's header row, fetching it at most once per HEADERS_TTL seconds."""
+        cached = st.session_state.gsheets_headers.get((worksheet.spreadsheet_id, worksheet.id))
+        if cached is not None and time.time() - cached[0] < HEADERS_TTL:
+            return cached[1]
+        return self._remember_headers(worksheet, worksheet.row_values(1))
             
+    @contextmanager
+    def _circuit(self):
+        """Run a Sheets write through the circuit breaker of the session's credentials.
+        
+        After CIRCUIT_BREAKER_THRESHOLD transient failures in a row, writes with those
+        credentials fail at once for CIRCUIT_BREAKER_COOLDOWN seconds instead of
+        waiting out the retries against a degraded backend.
+        """
+        key = st.session_state.gsheets_creds_key
+        with self._breaker_lock:
+            state = self._breakers.get(key)
+            if (state is not None and state[0] >= CIRCUIT_BREAKER_THRESHOLD
+                    and time.monotonic() - state[1] < CIRCUIT_BREAKER_COOLDOWN):
+                raise RuntimeError("Google Sheets is temporarily unavailable, please try again shortly")
+        
+        try:
+            yield
+        except Exception as e:
+            if _is_transient(e):
+                with self._breaker_lock:
+                    state = self._breakers.setdefault(key, [0, 0.0])
+                    state[0] += 1
+                    state[1] = time.monotonic()
+            raise
+        
+        with self._breaker_lock:
+            self._breakers.pop(key, None)
+    
+    def _authorize(self, creds):
+        """Return a gspread client whose session keeps connections open and retries transient failures."""
+        session = AuthorizedSession(creds)
+        # Rate limits and server errors are retried with exponential backoff, honoring Retry-After;
+        # the last response is returned so gspread still raises its usual APIError
+        retry = _SheetsRetry(total=5, backoff_factor=0.5, status_forcelist=RETRY_STATUSES, raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=10, max_retries=retry)
+        session.mount("https://", adapter)
+        return gspread.Client(auth=creds, session=session)
+    
     def authenticate_with_key(self, api_key_json):
         """Authenticate using a service account key JSON string."""
         try:
             # Parse the JSON key
-            creds_dict = json.loads(api_key_json)
-            
-            # Define the scope
-            scope = ['https://spreadsheets.google.com/feeds',
-                    'https://www.googleapis.com/auth/drive']
+            creds_dict = orjson.loads(api_key_json)
             
-            # Authenticate
-            creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, scope)
-            client = gspread.authorize(creds)
+            # Authenticate; google-auth reuses the access token until it expires
+            creds = Credentials.from_service_account_info(creds_dict, scopes=SCOPES)
+            client = self._authorize(creds)
             
             # Store in session state
             st.session_state.gsheets_creds = creds
             st.session_state.gsheets_client = client
+            st.session_state.gsheets_creds_key = hashlib.sha256(api_key_json.encode("utf-8")).hexdigest()
             
             return True, "Authentication successful"
         except Exception as e:
@@ -39,34 +276,21 @@ class GoogleSheetsIntegration:
     def authenticate_with_key_file(self, uploaded_file):
         """Authenticate using a service account key JSON file."""
         try:
-            # Create a temporary file to store the uploaded content
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.json') as tmp_file:
-                tmp_file.write(uploaded_file.getvalue())
-                tmp_file_path = tmp_file.name
-            
-            # Define the scope
-            scope = ['https://spreadsheets.google.com/feeds',
-                    'https://www.googleapis.com/auth/drive']
-            
-            # Authenticate using the temporary file
-            creds = ServiceAccountCredentials.from_json_keyfile_name(tmp_file_path, scope)
-            client = gspread.authorize(creds)
+            # Parse the uploaded key directly; no temporary file is needed
+            key_bytes = uploaded_file.getvalue()
+            creds_dict = orjson.loads(key_bytes)
             
-            # Clean up the temporary file
-            os.unlink(tmp_file_path)
+            # Authenticate; google-auth reuses the access token until it expires
+            creds = Credentials.from_service_account_info(creds_dict, scopes=SCOPES)
+            client = self._authorize(creds)
             
             # Store in session state
             st.session_state.gsheets_creds = creds
             st.session_state.gsheets_client = client
+            st.session_state.gsheets_creds_key = hashlib.sha256(key_bytes).hexdigest()
             
             return True, "Authentication successful"
         except Exception as e:
-            # Clean up the temporary file if it exists
-            if 'tmp_file_path' in locals():
-                try:
-                    os.unlink(tmp_file_path)
-                except:
-                    pass
             return False, f"Authentication failed: {str(e)}"
     
     def authenticate_with_oauth(self):
@@ -104,7 +328,7 @@ class GoogleSheetsIntegration:
         """Get data from a specific worksheet."""
         try:
             # Get the worksheet
-            worksheet = spreadsheet.get_worksheet(worksheet_index)
+            worksheet = self._get_worksheet(spreadsheet, worksheet_index)
             
             # Get all values including headers
             data = worksheet.get_all_values()
@@ -112,10 +336,15 @@ class GoogleSheetsIntegration:
             if not data:
                 return None, "Worksheet is empty"
             
-            # Convert to DataFrame
+            # Convert to DataFrame; the fetched header row also serves later writes
             headers = data[0]
+            self._remember_headers(worksheet, headers)
             rows = data[1:]
-            df = pd.DataFrame(rows, columns=headers)
+            
+            # get_all_values pads rows to the same width, so the cells form one 2-D object
+            # array that pandas keeps as a single block without inferring each column
+            cells = np.array(rows, dtype=object) if rows else np.empty((0, len(headers)), dtype=object)
+            df = pd.DataFrame(cells, columns=headers, copy=False)
             
             return df, "Success"
         except Exception as e:
@@ -125,61 +354,290 @@ class GoogleSheetsIntegration:
         """Update a specific row in the worksheet."""
         try:
             # Get the worksheet
-            worksheet = spreadsheet.get_worksheet(worksheet_index)
+            worksheet = self._get_worksheet(spreadsheet, worksheet_index)
             
             # Get headers to ensure correct column mapping
-            headers = worksheet.row_values(1)
+            headers = self._get_headers(worksheet)
+            
+            # Fetch the existing row once for values not provided in the update
+            existing = worksheet.row_values(row_index + 1)
             
             # Prepare row data in the correct order
-            row_data = []
-            for header in headers:
-                if header in data_dict:
-                    row_data.append(data_dict[header])
-                else:
-                    # Get existing value if not provided in update
-                    existing_value = worksheet.cell(row_index + 1, headers.index(header) + 1).value
-                    row_data.append(existing_value)
+            row_data = [
+                _cell_value(data_dict[header]) if header in data_dict
+                else (existing[i] if i < len(existing) else "")
+                for i, header in enumerate(headers)
+            ]
             
-            # Update the row (row_index + 1 because row_index is 0-based but API is 1-based)
-            worksheet.update_row(row_index + 1, row_data)
+            # Write the whole row as one range (row_index + 1 because row_index is 0-based but API is 1-based)
+            row_range = f"A{row_index + 1}:{gspread.utils.rowcol_to_a1(row_index + 1, len(headers))}"
+            with self._circuit():
+                worksheet.update(range_name=row_range, values=[row_data], value_input_option="RAW")
+            clear_worksheet_cache()
             
             return True, "Row updated successfully"
         except Exception as e:
             return False, f"Error updating row: {str(e)}"
     
+    def batch_update_rows(self, spreadsheet, worksheet_index, rows):
+        """Update several rows in the worksheet in a single request.
+        
+        rows is a list of (row_index, data_dict) pairs using the same 0-based
+        row indexes as update_row. Rows that provide every column are written
+        as one range; otherwise only the given columns are written.
+        """
+        try:
+            # Get the worksheet
+            worksheet = self._get_worksheet(spreadsheet, worksheet_index)
+            
+            # Get headers once to map columns for all rows
+            headers = self._get_headers(worksheet)
+            
+            data = []
+            for row_index, data_dict in rows:
+                sheet_row = row_index + 1  # row_index is 0-based but API is 1-based
+                if all(header in data_dict for header in headers):
+                    data.append({
+                        'range': f"A{sheet_row}:{gspread.utils.rowcol_to_a1(sheet_row, len(headers))}",
+                        'values': [[_cell_value(data_dict[header]) for header in headers]],
+                    })
+                else:
+                    data.extend(
+                        {'range': gspread.utils.rowcol_to_a1(sheet_row, col + 1), 'values': [[_cell_value(data_dict[header])]]}
+                        for col, header in enumerate(headers) if header in data_dict
+                    )
+            
+            if data:
+                with self._circuit():
+                    worksheet.batch_update(data, value_input_option="RAW")
+                clear_worksheet_cache()
+            
+            return True, f"{len(rows)} rows updated successfully"
+        except Exception as e:
+            return False, f"Error updating rows: {str(e)}"
+    
+    def update_cell(self, spreadsheet, worksheet_index, row_index, column_index, value):
+        """Update a single cell in the worksheet."""
+        try:
+            # Get the worksheet
+            worksheet = self._get_worksheet(spreadsheet, worksheet_index)
+            
+            # Update the cell (row_index and column_index are 0-based but API is 1-based)
+            with self._circuit():
+                worksheet.update_cell(row_index + 1, column_index + 1, _cell_value(value))
+            clear_worksheet_cache()
+            
+            return True, "Cell updated successfully"
+        except Exception as e:
+            return False, f"Error updating cell: {str(e)}"
+    
+    def update_cells(self, spreadsheet, worksheet_index, cells):
+        """Update several cells in the worksheet in a single request.
+        
+        cells is a list of (row_index, column_index, value) tuples using the
+        same 0-based indexes as update_cell.
+        """
+        try:
+            # Get the worksheet
+            worksheet = self._get_worksheet(spreadsheet, worksheet_index)
+            
+            # One range per cell, all sent in one batch update
+            data = [
+                {'range': gspread.utils.rowcol_to_a1(row_index + 1, column_index + 1), 'values': [[_cell_value(value)]]}
+                for row_index, column_index, value in cells
+            ]
+            with self._circuit():
+                worksheet.batch_update(data, value_input_option="RAW")
+            clear_worksheet_cache()
+            
+            return True, f"{len(data)} cells updated successfully"
+        except Exception as e:
+            return False, f"Error updating cells: {str(e)}"
+    
     def add_row(self, spreadsheet, worksheet_index, data_dict):
         """Add a new row to the worksheet."""
         try:
             # Get the worksheet
-            worksheet = spreadsheet.get_worksheet(worksheet_index)
+            worksheet = self._get_worksheet(spreadsheet, worksheet_index)
             
             # Get headers to ensure correct column mapping
-            headers = worksheet.row_values(1)
+            headers = self._get_headers(worksheet)
             
             # Prepare row data in the correct order
             row_data = []
             for header in headers:
                 if header in data_dict:
-                    row_data.append(data_dict[header])
+                    row_data.append(_cell_value(data_dict[header]))
                 else:
                     row_data.append("")  # Empty value for missing fields
             
             # Append the row
-            worksheet.append_row(row_data)
+            with self._circuit():
+                worksheet.append_row(row_data)
+            clear_worksheet_cache()
             
             return True, "Row added successfully"
         except Exception as e:
             return False, f"Error adding row: {str(e)}"
     
+    def add_rows(self, spreadsheet, worksheet_index, data_dicts):
+        """Add multiple rows to the worksheet in a single request.
+        
+        data_dicts is a list of product dicts or a DataFrame of products.
+        """
+        try:
+            # Get the worksheet
+            worksheet = self._get_worksheet(spreadsheet, worksheet_index)
+            
+            # Get headers to ensure correct column mapping
+            headers = self._get_headers(worksheet)
+            
+            # Prepare each row in the correct order, with empty values for missing fields
+            rows = _sheet_rows(data_dicts, headers)
+            
+            # Append all rows at once
+            with self._circuit():
+                worksheet.append_rows(rows, value_input_option="RAW")
+            clear_worksheet_cache()
+            
+            return True, f"{len(rows)} rows added successfully"
+        except Exception as e:
+            return False, f"Error adding rows: {str(e)}"
+    
     def delete_row(self, spreadsheet, worksheet_index, row_index):
         """Delete a specific row from the worksheet."""
         try:
             # Get the worksheet
-            worksheet = spreadsheet.get_worksheet(worksheet_index)
+            worksheet = self._get_worksheet(spreadsheet, worksheet_index)
             
             # Delete the row (row_index + 1 because row_index is 0-based but API is 1-based)
-            worksheet.delete_row(row_index + 1)
+            with self._circuit():
+                worksheet.delete_row(row_index + 1)
+            clear_worksheet_cache()
             
             return True, "Row deleted successfully"
         except Exception as e:
             return False, f"Error deleting row: {str(e)}"
+
+    def delete_rows_batch(self, spreadsheet, worksheet_index, row_indices):
+        """Delete several rows from the worksheet in a single request.
+
+        row_indices uses the same 0-based row indexes as delete_row.
+        """
+        try:
+            # Get the worksheet
+            worksheet = self._get_worksheet(spreadsheet, worksheet_index)
+
+            # Group the rows into contiguous runs, bottom-most first, so
+            # earlier deletions never shift the rows still to be deleted
+            runs = []
+            for row_index in sorted(set(row_indices), reverse=True):
+                if runs and runs[-1][0] == row_index + 1:
+                    runs[-1][0] = row_index
+                else:
+                    runs.append([row_index, row_index + 1])
+
+            # One deleteDimension request per run, all sent in one batch update
+            requests = [
+                {'deleteDimension': {'range': {
+                    'sheetId': worksheet.id,
+                    'dimension': 'ROWS',
+                    'startIndex': start,  # startIndex/endIndex are 0-based, end exclusive
+                    'endIndex': end,
+                }}}
+                for start, end in runs
+            ]
+            if requests:
+                with self._circuit():
+                    spreadsheet.batch_update({'requests': requests})
+                clear_worksheet_cache()
+
+            return True, f"{len(set(row_indices))} rows deleted successfully"
+        except Exception as e:
+            return False, f"Error deleting rows: {str(e)}"
+
+@st.cache_resource
+def _shared_sheets_integration():
+    return GoogleSheetsIntegration()
+
+def get_sheets_integration():
+    """Return the shared Google Sheets integration, initialized for the current session."""
+    sheets = _shared_sheets_integration()
+    sheets.init_session_state()
+    return sheets
+
+def _local_cache_path(spreadsheet_id, worksheet_index, credentials_key):
+    # Keyed on the credentials too, so one account never reads a sheet loaded by another
+    name = hashlib.sha256(f"{spreadsheet_id}\n{credentials_key}".encode()).hexdigest()[:16]
+    return os.path.join(LOCAL_CACHE_DIR, f"{name}_{worksheet_index}_v{LOCAL_CACHE_VERSION}.parquet")
+
+def _read_local_cache(path):
+    """Return the cached worksheet at path, or None if it is missing, stale or unreadable."""
+    try:
+        if time.time() - os.path.getmtime(path) < LOCAL_CACHE_MAX_AGE:
+            return pd.read_parquet(path)
+    except Exception:
+        pass
+    return None
+
+def _write_local_cache(path, df):
+    """Write the worksheet to path; the local cache is best effort, so failures are ignored."""
+    tmp_path = None
+    try:
+        os.makedirs(LOCAL_CACHE_DIR, exist_ok=True)
+        # Write to a temporary file first so readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=LOCAL_CACHE_DIR, suffix='.tmp')
+        os.close(fd)
+        df.to_parquet(tmp_path)
+        os.replace(tmp_path, path)
+    except Exception:
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def _remove_local_cache(path):
+    """Delete the cached worksheet at path, if any."""
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def clear_worksheet_cache():
+    """Drop cached worksheet data from memory and disk after a write to the sheet."""
+    _load_worksheet_data.clear()
+    if os.path.isdir(LOCAL_CACHE_DIR):
+        for name in os.listdir(LOCAL_CACHE_DIR):
+            if name.endswith('.parquet'):
+                _remove_local_cache(os.path.join(LOCAL_CACHE_DIR, name))
+
+@st.cache_resource(ttl=300, max_entries=16, show_spinner=False)
+def _load_worksheet_data(_sheets, _spreadsheet, spreadsheet_id, worksheet_index, credentials_key):
+    # Cached as a resource so hits skip pickling the frame; load_worksheet_data returns copies
+    cache_path = _local_cache_path(spreadsheet_id, worksheet_index, credentials_key)
+    df = _read_local_cache(cache_path)
+    if df is not None:
+        return df, "Success"
+    
+    df, message = _sheets.get_worksheet_data(_spreadsheet, worksheet_index)
+    if df is not None:
+        df = add_search_column(optimize_dtypes(df))
+        _write_local_cache(cache_path, df)
+    return df, message
+
+def load_worksheet_data(sheets, spreadsheet, worksheet_index=0, refresh=False):
+    """Get worksheet data with compact dtypes, cached per spreadsheet, worksheet and credentials.
+    
+    Loads are also kept on disk for LOCAL_CACHE_MAX_AGE seconds so they survive
+    server restarts. Writes made through GoogleSheetsIntegration clear both caches;
+    pass refresh=True to pick up edits made directly in the sheet.
+    """
+    credentials_key = st.session_state.gsheets_creds_key
+    if refresh:
+        _remove_local_cache(_local_cache_path(spreadsheet.id, worksheet_index, credentials_key))
+        _load_worksheet_data.clear()
+    
+    df, message = _load_worksheet_data(sheets, spreadsheet, spreadsheet.id, worksheet_index, credentials_key)
+    if df is None:
+        # Don't keep failed loads around for the whole TTL
+        _load_worksheet_data.clear()
+        return None, message
+    return df.copy(), message